@@ -0,0 +1,55 @@
+"""Compare the end-to-end analysis latency of the thread and the process mode.
+
+Run with `python benchmarks/bench_analysis_latency.py`. Frames of the default
+AnalyserSettings.image_shape are emitted one at a time and the latency from
+frameReady to new_analysis is recorded. The process mode pays for the round trip
+to the worker process and the copy of the result out of shared memory.
+"""
+
+import time
+from threading import Event
+from types import SimpleNamespace
+
+import numpy as np
+from psygnal import Signal, SignalGroup
+from useq import MDAEvent
+
+from pymmcore_eda.analyser import Analyser, AnalyserSettings
+from pymmcore_eda.event_hub import EventHub
+
+N_FRAMES = 50
+PREDICTION_TIME = 0.0
+
+
+class RunnerEvents(SignalGroup):
+    frameReady = Signal(np.ndarray, MDAEvent, dict)
+
+
+def run(mode: str) -> np.ndarray:
+    hub = EventHub(SimpleNamespace(events=RunnerEvents()))
+    done = Event()
+    hub.new_analysis.connect(lambda *_: done.set())
+    analyser = Analyser(hub, prediction_time=PREDICTION_TIME, mode=mode)
+    img = np.random.randint(0, 4096, AnalyserSettings.image_shape, dtype=np.uint16)
+    latencies = []
+    for t in range(N_FRAMES):
+        done.clear()
+        start = time.perf_counter()
+        hub.frameReady.emit(img, MDAEvent(index={"t": t, "c": 0}), {})
+        done.wait()
+        latencies.append(time.perf_counter() - start)
+    analyser.close()
+    # The first frames include allocating the rings
+    return np.array(latencies[3:]) * 1e3
+
+
+def main() -> None:
+    print(f"{'mode':>8} {'p50':>8} {'p90':>8} {'max':>8}  [ms]")
+    for mode in ("thread", "process"):
+        latencies = run(mode)
+        p50, p90 = np.percentile(latencies, [50, 90])
+        print(f"{mode:>8} {p50:>8.2f} {p90:>8.2f} {latencies.max():>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare the dispatch jitter of the default and the precision mode.
+
+Run with `python benchmarks/bench_dispatch_jitter.py`. Events are registered every
+5 ms and the latency from their planned time to the dispatch is recorded.
+"""
+
+import time
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.queue_manager import QueueManager
+
+N_EVENTS = 400
+INTERVAL = 0.005
+
+
+def run(precision_mode: bool) -> dict[str, float]:
+    queue_manager = QueueManager()
+    queue_manager.precision_mode = precision_mode
+    recorder = queue_manager.start_recording()
+    start = queue_manager.time_machine.event_seconds_elapsed() + 0.1
+    for i in range(N_EVENTS):
+        queue_manager.register_event(EDAEvent(min_start_time=start + i * INTERVAL))
+    time.sleep(0.2 + N_EVENTS * INTERVAL)
+    queue_manager.stop_seq()
+    process_time = time.process_time()
+    return {**recorder.summary()["dispatched"], "cpu_s": process_time}
+
+
+def main() -> None:
+    for precision_mode in (False, True):
+        cpu_start = time.process_time()
+        stats = run(precision_mode)
+        stats["cpu_s"] -= cpu_start
+        name = "precision" if precision_mode else "default"
+        print(f"{name:>10}: " + ", ".join(f"{k}={v:.3f}" for k, v in stats.items()))
+    print("latencies in ms")
+
+
+if __name__ == "__main__":
+    main()
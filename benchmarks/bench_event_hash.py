@@ -0,0 +1,46 @@
+"""Micro-benchmark for hashing and comparing events with array metadata.
+
+Run with `python benchmarks/bench_event_hash.py`. Events carrying analysis masks
+are hashed on every membership test in the queue, the cached hash keeps this
+independent of the size of the metadata.
+"""
+
+import time
+
+import numpy as np
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.helpers.function_helpers import dicts_equal, hash_dict
+
+SHAPES = ((0, 0), (64, 64), (512, 512), (1024, 1024))
+N_CALLS = 1_000
+
+
+def per_call_us(func, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        func(*args)
+    return (time.perf_counter() - start) / N_CALLS * 1e6
+
+
+def main() -> None:
+    print(
+        f"{'mask':>12} {'hash_dict':>12} {'dicts_eq':>12} {'hash':>8} {'eq':>8}"
+        "  [us/call]"
+    )
+    for shape in SHAPES:
+        mask = np.random.default_rng(0).integers(0, 2, shape, dtype=np.uint16)
+        metadata = {"mask": mask, "info": {"cells": 12}}
+        event = EDAEvent(min_start_time=1.0, metadata=metadata)
+        other = EDAEvent(min_start_time=1.0, metadata=dict(metadata))
+        print(
+            f"{'x'.join(map(str, shape)):>12} "
+            f"{per_call_us(hash_dict, metadata):>12.1f} "
+            f"{per_call_us(dicts_equal, metadata, metadata):>12.1f} "
+            f"{per_call_us(hash, event):>8.2f} "
+            f"{per_call_us(event.__eq__, other):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
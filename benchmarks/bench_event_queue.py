@@ -0,0 +1,99 @@
+"""Micro-benchmark for positional lookups in the DynamicEventQueue.
+
+Run with `python benchmarks/bench_event_queue.py`. The cost per call of the
+lookups used on the dispatch path should stay flat while the queue grows, as
+should the cost of adding an event to a time point that holds many events.
+Last, the sorted and the array backend are compared on bulk registration of an
+MDASequence and on draining the queue batch by batch.
+"""
+
+import time
+
+from useq import MDASequence
+
+from pymmcore_eda._array_event_queue import ArrayEventQueue
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda._event_queue import DynamicEventQueue
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+CROWD_SIZES = (10, 100, 1_000, 10_000)
+BACKENDS = {"sorted": DynamicEventQueue, "array": ArrayEventQueue}
+N_TIMEPOINTS = (10, 100, 1_000)
+N_CALLS = 10_000
+
+
+def per_call_us(func, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        func(*args)
+    return (time.perf_counter() - start) / N_CALLS * 1e6
+
+
+def fill_queue(queue: DynamicEventQueue, start: int, stop: int) -> None:
+    for i in range(start, stop):
+        queue.add(EDAEvent(min_start_time=float(i)))
+
+
+def add_to_crowded_time_point() -> None:
+    print(f"{'events at t':>12} {'add':>10}  [us/call]")
+    for size in CROWD_SIZES:
+        queue = DynamicEventQueue()
+        queue.add_many(
+            EDAEvent(min_start_time=1.0, z_pos=float(z)) for z in range(size)
+        )
+        events = [
+            EDAEvent(min_start_time=1.0, z_pos=float(size + i)) for i in range(1_000)
+        ]
+        start = time.perf_counter()
+        for event in events:
+            queue.add(event)
+        per_call = (time.perf_counter() - start) / len(events) * 1e6
+        print(f"{size:>12} {per_call:>10.3f}")
+
+
+def main() -> None:
+    queue = DynamicEventQueue()
+    filled = 0
+    print(f"{'size':>10} {'len':>10} {'value_at':>10} {'index_of':>10}  [us/call]")
+    for size in SIZES:
+        fill_queue(queue, filled, size)
+        filled = size
+        middle = size // 2
+        print(
+            f"{size:>10} "
+            f"{per_call_us(len, queue):>10.3f} "
+            f"{per_call_us(queue.get_value_at_index, 't', middle):>10.3f} "
+            f"{per_call_us(queue._get_index_of_value, 't', float(middle)):>10.3f}"
+        )
+
+
+def compare_backends() -> None:
+    print(f"{'events':>10} {'backend':>8} {'add_many':>10} {'drain':>10}  [ms]")
+    for loops in N_TIMEPOINTS:
+        sequence = MDASequence(
+            channels=["DAPI", "FITC"],
+            stage_positions=[(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)],
+            z_plan={"range": 4, "step": 0.5},
+            time_plan={"interval": 1, "loops": loops},
+        )
+        for name, backend in BACKENDS.items():
+            # Conversion is not part of the measurement
+            events = EDAEvent.from_mda_events(sequence)
+            queue = backend()
+            start = time.perf_counter()
+            queue.add_many(events)
+            queue.peak_next()  # the array backend sorts lazily
+            added = time.perf_counter()
+            while queue.get_next_batch():
+                pass
+            drained = time.perf_counter()
+            print(
+                f"{len(events):>10} {name:>8} {(added - start) * 1e3:>10.1f} "
+                f"{(drained - added) * 1e3:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
+    add_to_crowded_time_point()
+    compare_backends()
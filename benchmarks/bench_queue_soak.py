@@ -0,0 +1,64 @@
+"""Soak test of the memory of a long-running DynamicEventQueue.
+
+Run with `python benchmarks/bench_queue_soak.py [n_events]`, 1e6 events by
+default. Events are streamed through the queue like in a multi-day acquisition,
+with z positions and position names that smart actuators add on the fly. With
+compaction the traced memory stays flat, without it the unique sets keep growing.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda._event_queue import DynamicEventQueue
+
+N_EVENTS = 1_000_000
+EVENTS_PER_TIME_POINT = 4
+AHEAD = 50  # time points registered ahead of the dispatched one
+N_REPORTS = 10
+
+
+def soak(n_events: int, compact_every: int | None) -> None:
+    rng = np.random.default_rng(0)
+    queue = DynamicEventQueue()
+    queue.compact_every = compact_every
+    n_time_points = n_events // EVENTS_PER_TIME_POINT
+    report_every = max(n_time_points // N_REPORTS, 1)
+
+    def add_time_point(t: int) -> None:
+        queue.add_many(
+            EDAEvent(
+                min_start_time=t * 0.5,
+                z_pos=float(np.round(rng.normal(0, 50), 2)),
+                pos_name=f"cell_{rng.integers(0, 1_000_000)}",
+            )
+            for _ in range(EVENTS_PER_TIME_POINT)
+        )
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    print(f"compact_every={compact_every}")
+    print(f"{'events':>10} {'memory [MB]':>12} {'z values':>10} {'us/event':>10}")
+    for t in range(AHEAD):
+        add_time_point(t)
+    for t in range(n_time_points):
+        add_time_point(t + AHEAD)
+        queue.get_next_batch()
+        if (t + 1) % report_every == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            n_done = (t + 1) * EVENTS_PER_TIME_POINT
+            per_event = (time.perf_counter() - start) / n_done * 1e6
+            print(
+                f"{n_done:>10} {current / 1e6:>12.2f} "
+                f"{len(queue.get_unique_values('z')):>10} {per_event:>10.1f}"
+            )
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    n_events = int(float(sys.argv[1])) if len(sys.argv) > 1 else N_EVENTS
+    soak(n_events, compact_every=100)
+    soak(n_events, compact_every=None)
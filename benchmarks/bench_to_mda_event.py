@@ -0,0 +1,49 @@
+"""Micro-benchmark for the conversion of EDAEvents to MDAEvents.
+
+Run with `python benchmarks/bench_to_mda_event.py`. Every dispatched event is
+converted, so this is on the path between the timer firing and the runner
+receiving the event.
+"""
+
+import time
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda._eda_sequence import EDASequence
+
+N_CALLS = 20_000
+
+
+def per_call_us(event: EDAEvent, strict: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        event.to_mda_event(strict=strict)
+    return (time.perf_counter() - start) / N_CALLS * 1e6
+
+
+def main() -> None:
+    sequence = EDASequence(channels=("DAPI", "GFP", "Cy5"), axis_order="tpgcz")
+    events = {
+        "bare": EDAEvent(min_start_time=1.0),
+        "full": EDAEvent(
+            index={"t": 1, "p": 0, "c": 1, "z": 4},
+            min_start_time=1.0,
+            channel="GFP",
+            exposure=10,
+            x_pos=100,
+            y_pos=200,
+            z_pos=4,
+            pos_name="A1",
+            properties=[("Camera", "Binning", 2), ("Laser", "Power", 10)],
+            metadata={"info": {"well": "A1", "cells": list(range(20))}},
+            sequence=sequence,
+        ),
+    }
+    print(f"{'event':>6} {'strict':>10} {'fast':>10} {'speedup':>8}  [us/call]")
+    for name, event in events.items():
+        strict = per_call_us(event, strict=True)
+        fast = per_call_us(event, strict=False)
+        print(f"{name:>6} {strict:>10.2f} {fast:>10.2f} {strict / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
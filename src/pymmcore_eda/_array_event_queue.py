@@ -0,0 +1,394 @@
+from collections.abc import Callable, Iterable, Iterator
+from math import isqrt
+
+import numpy as np
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda._event_queue import DynamicEventQueue
+
+# Merge the recent run into the main run with one vectorised binary search if it
+# holds fewer than 1 / _MERGE_RATIO of the events, re-sort both with lexsort otherwise.
+_MERGE_RATIO = 8
+# The recent run is merged into the main run once it holds more than
+# max(_MIN_RECENT, sqrt(len(main))) events.
+_MIN_RECENT = 256
+# The pending events are sorted into the recent run on read once there are as many
+_MAX_PENDING = 64
+
+
+class _Run:
+    """Rows sorted by the sort columns, rows before head are taken."""
+
+    def __init__(self, columns: dict[str, np.ndarray]) -> None:
+        self.columns = columns
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.columns["serial"]) - self.head
+
+
+class EventArray:
+    """Events ordered by their sort key, with their fields held in NumPy columns.
+
+    Every dimension of the sort key, see EDAEvent.get_sort_key, is a float column
+    named after the dimension, holding -inf for None and inf for strings, and a text
+    column ordering the strings. actuator_id, channel, pos_index and pos_name are
+    columns as well, for find, and a serial number refers to the event, which is
+    only looked up when it is taken or listed.
+
+    Added events wait in a pending list, whose first event is tracked on add. Once
+    there are _MAX_PENDING of them, they are sorted into a small recent
+    run with lexsort, which is merged into the main run once it holds more than
+    sqrt(n) events, so a single add costs O(sqrt(n)) amortised. Removed events
+    are only forgotten, their rows are skipped at the head and compacted away once
+    they are the majority. Equal keys keep the order in which the events were added.
+    """
+
+    def __init__(
+        self,
+        key: Callable[[EDAEvent], tuple[float | str, ...]],
+        axis_order: tuple[str, ...],
+        events: Iterable[EDAEvent] = (),
+    ) -> None:
+        self._key = key
+        self._axis_order = axis_order
+        # Most significant first, as in the sort key
+        self._sort_columns = [
+            name for dim in axis_order for name in (dim, f"{dim}_text")
+        ]
+        self._main = self._empty_run()
+        self._recent = self._empty_run()
+        # Events with their serial, serials from _flushed on are pending
+        self._pending: list[tuple[int, EDAEvent]] = []
+        self._serial = self._flushed = 0
+        # Row and serial of the first pending event, None if it has to be searched
+        self._pending_head: tuple[tuple[float | str, ...], int] | None = None
+        self._members: dict[EDAEvent, int] = {}
+        self._by_serial: dict[int, EDAEvent] = {}
+        # Rows in the runs whose event was removed
+        self._n_dead = 0
+        self.update(events)
+
+    def add(self, event: EDAEvent) -> None:
+        """Add an event, in O(1) until the order is needed."""
+        if event in self._members:
+            return
+        serial = self._serial
+        self._serial += 1
+        self._members[event] = serial
+        self._by_serial[serial] = event
+        head = self._pending_head
+        if len(self._pending) >= _MAX_PENDING:
+            self._pending_head = None  # sorted on the next read
+        elif not self._pending or head is not None:
+            row = self._row_of(event)
+            if head is None or row < head[0]:
+                self._pending_head = (row, serial)
+        self._pending.append((serial, event))
+
+    def update(self, events: Iterable[EDAEvent]) -> None:
+        """Add many events."""
+        for event in events:
+            self.add(event)
+
+    def clear(self) -> None:
+        """Remove all events."""
+        self._main = self._empty_run()
+        self._recent = self._empty_run()
+        self._pending.clear()
+        self._pending_head = None
+        self._flushed = self._serial
+        self._members.clear()
+        self._by_serial.clear()
+        self._n_dead = 0
+
+    def pop(self, index: int = 0) -> EDAEvent:
+        """Remove and return the event at index, the head in O(1)."""
+        event = self[index]
+        self.remove(event)
+        return event
+
+    def remove(self, event: EDAEvent) -> None:
+        """Remove an event equal to event in O(1), raise ValueError if there is none."""
+        serial = self._members.pop(event, None)
+        if serial is None:
+            raise ValueError(f"{event!r} not in EventArray")
+        del self._by_serial[serial]
+        if serial >= self._flushed:
+            if self._pending_head is not None and self._pending_head[1] == serial:
+                self._pending_head = None
+        else:
+            self._n_dead += 1
+            if self._n_dead > len(self._by_serial):
+                self._compact()
+
+    def find(
+        self,
+        actuator_id: str | None = None,
+        channel: str | None = None,
+        pos_index: int | None = None,
+        pos_name: str | None = None,
+    ) -> list[EDAEvent]:
+        """Events that match all given criteria in order, see DynamicEventQueue.find.
+
+        Selects on the columns, None matches any event.
+        """
+        self._merge_recent()
+        run = self._main
+        serials = run.columns["serial"]
+        mask = np.zeros(len(serials), dtype=bool)
+        mask[run.head :] = True
+        criteria = {
+            "actuator_id": actuator_id,
+            "channel": channel,
+            "pos_index": pos_index,
+            "pos_name": pos_name,
+        }
+        for field, value in criteria.items():
+            if value is not None:
+                mask &= run.columns[field] == value
+        by_serial = self._by_serial
+        return [by_serial[s] for s in serials[mask].tolist() if s in by_serial]
+
+    def __contains__(self, event: object) -> bool:
+        return event in self._members
+
+    def __getitem__(self, index: int) -> EDAEvent:
+        if index == 0:
+            return self._head()
+        return self._live_events()[index]
+
+    def __iter__(self) -> Iterator[EDAEvent]:
+        return iter(self._live_events())
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def _empty_run(self) -> _Run:
+        return _Run(self._columns([]))
+
+    def _head(self) -> EDAEvent:
+        """The first event, the least of the heads of the runs and the pending list."""
+        if len(self._pending) >= _MAX_PENDING:
+            self._flush()
+        runs = []
+        for run in (self._main, self._recent):
+            serials = run.columns["serial"]
+            while run.head < len(serials) and (
+                int(serials[run.head]) not in self._by_serial
+            ):
+                run.head += 1
+            if len(run):
+                runs.append(run)
+        if self._pending and self._pending_head is None:
+            self._pending_head = min(
+                (
+                    (self._row_of(event), serial)
+                    for serial, event in self._pending
+                    if serial in self._by_serial
+                ),
+                default=None,
+            )
+        if len(runs) == 1 and self._pending_head is None:
+            run = runs[0]
+            return self._by_serial[int(run.columns["serial"][run.head])]
+        heads = [(self._row(run), int(run.columns["serial"][run.head])) for run in runs]
+        if self._pending_head is not None:
+            heads.append(self._pending_head)
+        if not heads:
+            raise IndexError("EventArray is empty")
+        # min keeps the first of equal keys: main before recent before pending
+        return self._by_serial[min(heads, key=lambda head: head[0])[1]]
+
+    def _row(self, run: _Run) -> tuple[float | str, ...]:
+        return tuple(run.columns[name][run.head] for name in self._sort_columns)
+
+    def _row_of(self, event: EDAEvent) -> tuple[float | str, ...]:
+        """The values of the sort columns for event."""
+        key = self._key(event)
+        row: list[float | str] = []
+        for rank, value in zip(key[0::2], key[1::2], strict=True):
+            if rank == 1:
+                row.extend((value, ""))
+            elif rank == 2:
+                row.extend((np.inf, value))
+            else:
+                row.extend((-np.inf, ""))
+        return tuple(row)
+
+    def _live_events(self) -> list[EDAEvent]:
+        self._merge_recent()
+        run = self._main
+        by_serial = self._by_serial
+        serials = run.columns["serial"][run.head :].tolist()
+        return [by_serial[s] for s in serials if s in by_serial]
+
+    def _columns(self, entries: list[tuple[int, EDAEvent]]) -> dict[str, np.ndarray]:
+        """Columns of events with their serials, in the given order."""
+        events = [event for _, event in entries]
+        n_dims = len(self._axis_order)
+        keys = np.array([self._key(event) for event in events], dtype=object)
+        keys = keys.reshape(len(events), 2 * n_dims)
+        ranks, values = keys[:, 0::2], keys[:, 1::2]
+        is_text = ranks == 2
+        # None before all numbers, strings after them
+        numbers = np.where(ranks == 1, values, np.where(is_text, np.inf, -np.inf))
+        numbers = numbers.astype(np.float64).T
+        if is_text.any():
+            texts = np.where(is_text, values, "").astype(np.str_).T
+        else:
+            texts = np.full((n_dims, len(events)), "", dtype="<U1")
+        columns = {}
+        for i, dim in enumerate(self._axis_order):
+            columns[dim] = np.ascontiguousarray(numbers[i])
+            columns[f"{dim}_text"] = np.ascontiguousarray(texts[i])
+        columns["actuator_id"] = np.array(
+            [event.actuator_id or "" for event in events], dtype=np.str_
+        )
+        columns["channel"] = np.array(
+            [event.channel.config if event.channel else "" for event in events],
+            dtype=np.str_,
+        )
+        columns["pos_index"] = np.array(
+            [np.nan if e.pos_index is None else e.pos_index for e in events],
+            dtype=np.float64,
+        )
+        columns["pos_name"] = np.array(
+            [event.pos_name or "" for event in events], dtype=np.str_
+        )
+        columns["serial"] = np.array([serial for serial, _ in entries], dtype=np.int64)
+        return columns
+
+    def _sort_keys(self, *runs: dict[str, np.ndarray]) -> list[str]:
+        """Sort columns of runs, without text columns that are empty in all runs."""
+        return [
+            name
+            for name in self._sort_columns
+            if not name.endswith("_text")
+            or any((columns[name] != "").any() for columns in runs)
+        ]
+
+    def _sorted(self, columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        # lexsort sorts by the last key first and is stable
+        names = self._sort_keys(columns)
+        order = np.lexsort([columns[name] for name in reversed(names)])
+        return {name: column[order] for name, column in columns.items()}
+
+    def _flush(self) -> None:
+        """Sort the pending events into the recent run."""
+        if not self._pending:
+            return
+        # Events removed while pending never get a row
+        pending = [(s, e) for s, e in self._pending if s in self._by_serial]
+        self._pending = []
+        self._pending_head = None
+        self._flushed = self._serial
+        columns = self._columns(pending)
+        recent = self._taken(self._recent)
+        self._recent = _Run(
+            self._sorted(
+                {
+                    name: np.concatenate((recent[name], columns[name]))
+                    for name in columns
+                }
+            )
+        )
+        if len(self._recent) > max(_MIN_RECENT, isqrt(len(self._main))):
+            self._merge_recent()
+
+    def _merge_recent(self) -> None:
+        """Merge the pending events and the recent run into the main run."""
+        self._flush()
+        if not len(self._recent):
+            return
+        older, newer = self._taken(self._main), self._taken(self._recent)
+        self._recent = self._empty_run()
+        n_older, n_newer = len(older["serial"]), len(newer["serial"])
+        if n_older == 0:
+            self._main = _Run(newer)
+            return
+        if n_newer * _MERGE_RATIO >= n_older:
+            # Stable, the newer events stay behind equal older ones
+            merged = {
+                name: np.concatenate((older[name], newer[name])) for name in older
+            }
+            self._main = _Run(self._sorted(merged))
+            return
+        positions = self._insert_positions(older, newer)
+        positions += np.arange(n_newer)
+        is_newer = np.zeros(n_older + n_newer, dtype=bool)
+        is_newer[positions] = True
+        columns = {}
+        for name, column in older.items():
+            dtype = np.result_type(column, newer[name])
+            columns[name] = np.empty(n_older + n_newer, dtype=dtype)
+            columns[name][positions] = newer[name]
+            columns[name][~is_newer] = column
+        self._main = _Run(columns)
+
+    def _insert_positions(
+        self, run: dict[str, np.ndarray], rows: dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Index in run behind the equal keys for each of rows, run is sorted.
+
+        One binary search for all rows at once, comparing the sort columns in turn.
+        """
+        names = self._sort_keys(run, rows)
+        n = len(run["serial"])
+        lo = np.zeros(len(rows["serial"]), dtype=np.intp)
+        hi = np.full(len(rows["serial"]), n, dtype=np.intp)
+        while (searching := lo < hi).any():
+            mid = (lo + hi) // 2
+            at = np.minimum(mid, n - 1)
+            less = np.zeros(len(lo), dtype=bool)
+            equal = np.ones(len(lo), dtype=bool)
+            for name in names:
+                value, row = run[name][at], rows[name]
+                less |= equal & (value < row)
+                equal &= value == row
+            not_greater = less | equal
+            lo = np.where(searching & not_greater, mid + 1, lo)
+            hi = np.where(searching & ~not_greater, mid, hi)
+        return lo
+
+    def _taken(self, run: _Run) -> dict[str, np.ndarray]:
+        """Columns of run without the rows before its head."""
+        self._n_dead -= run.head
+        return {name: column[run.head :] for name, column in run.columns.items()}
+
+    def _compact(self) -> None:
+        """Drop the rows of the removed events from the runs."""
+        live = np.fromiter(self._by_serial, dtype=np.int64, count=len(self._by_serial))
+        for run in (self._main, self._recent):
+            keep = np.isin(run.columns["serial"], live)
+            keep[: run.head] = False
+            run.columns = {name: column[keep] for name, column in run.columns.items()}
+            run.head = 0
+        self._n_dead = 0
+
+
+class ArrayEventQueue(DynamicEventQueue):
+    """DynamicEventQueue that orders its events in NumPy arrays, see EventArray.
+
+    Bulk registration of many events sorts them in one vectorised pass instead of
+    inserting them one by one into a sorted list.
+    """
+
+    _events: EventArray
+
+    def _new_container(self, events: Iterable[EDAEvent] = ()) -> EventArray:
+        return EventArray(self.sort_key, self._axis_order, events)
+
+    def find(
+        self,
+        actuator_id: str | None = None,
+        channel: str | None = None,
+        pos_index: int | None = None,
+        pos_name: str | None = None,
+    ) -> list[EDAEvent]:
+        """Pending events that match all given criteria, in the order of the queue.
+
+        Like DynamicEventQueue.find, but selects on the columns of the EventArray.
+        """
+        with self._lock:
+            return self._events.find(actuator_id, channel, pos_index, pos_name)
@@ -1,12 +1,15 @@
-from typing import TYPE_CHECKING, Any, Self
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, ClassVar, Self
 
-from pydantic import Field, field_validator
+from pydantic import Field, PrivateAttr, field_validator
 from useq import Channel, MDAEvent, MDASequence, PropertyTuple, SLMImage
 from useq._actions import AcquireImage, AnyAction
 from useq._base_model import MutableModel
+from useq._mda_event import Channel as EventChannel
+from useq._mda_event import ReadOnlyDict
 
 from pymmcore_eda._eda_sequence import EDASequence
-from pymmcore_eda.helpers.function_helpers import dicts_equal, hash_dict
+from pymmcore_eda.helpers.function_helpers import hash_dict
 
 try:
     from pydantic import field_serializer
@@ -23,6 +26,30 @@ def _float_or_none(v: Any) -> float | None:
     return float(v) if v is not None else v
 
 
+def _to_eda_sequence(value: dict[str, Any]) -> EDASequence:
+    """EDASequence from the dumped sequence of an MDAEvent."""
+    try:
+        return EDASequence(**value)
+    except TypeError:
+        return EDASequence().from_mda_sequence(MDASequence(**value))
+
+
+# Fields that take part in the ordering of events, changing them invalidates the key
+_SORT_FIELDS = frozenset(
+    ("min_start_time", "channel", "z_pos", "pos_index", "pos_name", "sequence")
+)
+# Fields that take part in the hash, changing them invalidates the cached hash
+_HASH_FIELDS = _SORT_FIELDS | {
+    "exposure",
+    "properties",
+    "action",
+    "keep_shutter_open",
+    "x_pos",
+    "y_pos",
+    "metadata",
+}
+
+
 class EDAEvent(MutableModel):
     """Define a single event in a [`EDASequence`][EDASequence].
 
@@ -65,6 +92,47 @@ class EDAEvent(MutableModel):
     keep_shutter_open: bool = False
     reset_event_timer: bool = False
 
+    # Debug flag: validate the MDAEvents built by to_mda_event field by field
+    strict_conversion: ClassVar[bool] = False
+
+    # (axis_order, key) of the last computed sort key
+    _sort_key: tuple[tuple[str, ...], tuple[float | str, ...]] | None = PrivateAttr(
+        default=None
+    )
+
+    # Cached hash and digest of the metadata, see __hash__ and metadata_digest
+    _hash: int | None = PrivateAttr(default=None)
+    _metadata_digest: str | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Start with empty caches, also for events built with model_construct."""
+        super().model_post_init(__context)
+        private: dict[str, Any] = self.__pydantic_private__  # type: ignore[assignment]
+        private["_sort_key"] = private["_hash"] = private["_metadata_digest"] = None
+
+    # The caches are read and written through __pydantic_private__ directly, the
+    # attribute access of pydantic costs more than a cache hit saves.
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _HASH_FIELDS:
+            private: dict[str, Any] = self.__pydantic_private__  # type: ignore[assignment]
+            private["_hash"] = None
+            if name == "metadata":
+                private["_metadata_digest"] = None
+            elif name in _SORT_FIELDS:
+                private["_sort_key"] = None
+
+    _actuator_id: str | None = PrivateAttr(default=None)
+
+    @property
+    def actuator_id(self) -> str | None:
+        """Id of the actuator that registered the event, not part of its identity."""
+        return self._actuator_id
+
+    @actuator_id.setter
+    def actuator_id(self, value: str | None) -> None:
+        self._actuator_id = value
+
     @field_validator("channel", mode="before")
     def _validate_channel(cls, val: Any) -> Any:
         return Channel(config=val) if isinstance(val, str) else val
@@ -114,83 +182,70 @@ class EDAEvent(MutableModel):
             return self.sequence.axis_order
         return ("t", "p", "g", "c", "z")  # Default axis order
 
-    def __lt__(self, other: Self) -> bool:
-        """Compare two EDAEvents based on the axis_order from the sequence."""
-        if not isinstance(other, EDAEvent):
-            return NotImplemented
+    @property
+    def sort_key(self) -> tuple[float | str, ...]:
+        """Sort key following the axis_order of the event's own sequence."""
+        return self.get_sort_key()
 
-        # Get axis order from sequence or use the default ('t', 'p', 'g', 'c', 'z')
-        axis_order = self._get_axis_order()
+    def get_sort_key(
+        self, axis_order: tuple[str, ...] | None = None
+    ) -> tuple[float | str, ...]:
+        """Totally ordered key following axis_order, computed once and cached.
 
-        # Compare based on each dimension in the axis order
+        Every dimension contributes a (rank, value) pair: None values get rank 0,
+        numeric values rank 1 and strings (e.g. channels not in the sequence) rank 2,
+        so values of different types are never compared against each other.
+        The cache is dropped whenever one of the fields used for sorting is set.
+        """
+        if axis_order is None:
+            axis_order = self._get_axis_order()
+        private: dict[str, Any] = self.__pydantic_private__  # type: ignore[assignment]
+        cached: tuple[tuple[str, ...], tuple[float | str, ...]] | None = private[
+            "_sort_key"
+        ]
+        if cached is None or (cached[0] is not axis_order and cached[0] != axis_order):
+            cached = (axis_order, self._compute_sort_key(axis_order))
+            private["_sort_key"] = cached
+        return cached[1]
+
+    def _compute_sort_key(self, axis_order: tuple[str, ...]) -> tuple[float | str, ...]:
+        key: list[float | str] = []
         for dim in axis_order:
-            self_val = self._get_dimension_value(dim)
-            other_val = other._get_dimension_value(dim)
-
-            # Skip dimensions where both values are None
-            if self_val is None and other_val is None:
-                continue
+            val = self._get_dimension_value(dim)
+            if val is None:
+                key.extend((0, 0.0))
+            elif isinstance(val, str):
+                key.extend((2, val))
+            elif dim == "z" and self._z_descending():
+                key.extend((1, -float(val)))
+            else:
+                key.extend((1, float(val)))
+        return tuple(key)
+
+    def _z_descending(self) -> bool:
+        """Whether z should be sorted top to bottom for this event."""
+        if not isinstance(self.sequence, EDASequence):
+            return False
+        if self.sequence.z_direction == "down":
+            return True
+        if self.sequence.z_direction == "alternate":
+            # For alternate mode, even channels go up, odd channels go down
+            channel_index = self._get_channel_index()
+            return channel_index is not False and channel_index % 2 == 1
+        return False
 
-            # None is considered less than any value
-            if self_val is None:
-                return True
-            if other_val is None:
-                return False
+    def __lt__(self, other: Self) -> bool:
+        """Compare two EDAEvents based on the axis_order from the sequence."""
+        if not isinstance(other, EDAEvent):
+            return NotImplemented
 
-            # If values differ, return the comparison result
-            if self_val != other_val:
-                if dim == "z" and hasattr(self.sequence, "z_direction"):
-                    # For z-direction comparison, use the sequence's z_direction
-                    return self._get_z_comparison(other, self_val, other_val) or False
-                # For string comparison (like position group names)
-                if (
-                    isinstance(self_val, str)
-                    and isinstance(other_val, str)
-                    and dim != "c"
-                ):
-                    return self_val < other_val
-                # For numeric comparisons (time, position index, z, channel index)
-                try:
-                    return float(self_val) < float(other_val)
-                except ValueError:
-                    # One of the items could not be indexed, it will go later
-                    if isinstance(self_val, str):
-                        return False
-                    elif isinstance(other_val, str):
-                        return True
-                    else:
-                        print("Error in channel comparison")
+        self_key, other_key = self.sort_key, other.sort_key
+        if self_key != other_key:
+            return self_key < other_key
 
         # If everything is equal, this should not matter, the set will reject the event
         return id(self) < id(other)
 
-    def _get_z_comparison(self, other: Self, self_z: Any, other_z: Any) -> bool | None:
-        """Determine the z comparison direction based on z_direction property."""
-        if not hasattr(self.sequence, "z_direction"):
-            return bool(self_z < other_z)  # Default to ascending order
-
-        if self.sequence and isinstance(self.sequence, EDASequence):
-            z_direction = self.sequence.z_direction
-        else:
-            z_direction = "up"  # Default to ascending if no sequence is available
-
-        if z_direction == "up":
-            return bool(self_z < other_z)
-        elif z_direction == "down":
-            return bool(self_z > other_z)
-        elif z_direction == "alternate":
-            # For alternate mode, even channels go up, odd channels go down
-            channel_index = self._get_channel_index()
-            if channel_index is False:
-                return bool(self_z < other_z)  # Default if channel index not found
-            return (
-                bool(self_z < other_z)
-                if channel_index % 2 == 0
-                else bool(self_z > other_z)
-            )
-        else:
-            return bool(self_z < other_z)  # Unknown direction, default to ascending
-
     def __eq__(self, other: object) -> bool:
         """
         Check if two EDAEvents are equal based on the axis_order from the sequence.
@@ -225,10 +280,31 @@ class EDAEvent(MutableModel):
             and self.z_pos == other.z_pos
             and self.x_pos == other.x_pos
             and self.y_pos == other.y_pos
-            and dicts_equal(self.metadata, other.metadata)
+            and self.metadata_digest == other.metadata_digest
         )
 
+    @property
+    def metadata_digest(self) -> str:
+        """Digest of the metadata, computed once until the metadata is set again.
+
+        The metadata is compared and hashed through this digest, changing the dict
+        in place is not noticed.
+        """
+        private: dict[str, Any] = self.__pydantic_private__  # type: ignore[assignment]
+        digest: str | None = private["_metadata_digest"]
+        if digest is None:
+            digest = private["_metadata_digest"] = hash_dict(self.metadata)
+        return digest
+
     def __hash__(self) -> int:
+        """Hash of the fields compared in __eq__, cached until one of them is set."""
+        private: dict[str, Any] = self.__pydantic_private__  # type: ignore[assignment]
+        cached: int | None = private["_hash"]
+        if cached is None:
+            cached = private["_hash"] = self._compute_hash()
+        return cached
+
+    def _compute_hash(self) -> int:
         # Create a hashable representation of the event as in __eq__
         hashable_parts: list[
             PropertyTuple | float | str | int | None | tuple[PropertyTuple, ...]
@@ -252,7 +328,11 @@ class EDAEvent(MutableModel):
                 if hasattr(self.action, "__hash__")
                 else id(self.action),
                 self.keep_shutter_open,
-                hash_dict(self.metadata),
+                # Compared in __eq__, events of stage positions without pos_index
+                # would share a hash otherwise
+                self.x_pos,
+                self.y_pos,
+                self.metadata_digest,
             ]
         )
 
@@ -301,19 +381,115 @@ class EDAEvent(MutableModel):
                 setattr(self, key, self.sequence)
                 continue
             elif key == "sequence" and isinstance(value, dict):
-                try:
-                    setattr(self, key, EDASequence(**value))
-                except TypeError:
-                    mda_seq = MDASequence(**value)
-                    setattr(self, key, EDASequence().from_mda_sequence(mda_seq))
+                setattr(self, key, _to_eda_sequence(value))
                 continue
             setattr(self, key, value)
         return self
 
-    def to_mda_event(self, retain_min_start_time: bool = False) -> MDAEvent:
-        """Convert this EDAEvent to a useq.MDAEvent instance."""
-        # Create a copy of the current event
+    @classmethod
+    def from_mda_events(
+        cls, mda_events: Iterable[MDAEvent], eda_sequence: EDASequence | None = None
+    ) -> list["EDAEvent"]:
+        """Create EDAEvents from many useq.MDAEvents at once.
+
+        Gives the same events as from_mda_event, but the validated fields of the
+        MDAEvents are taken over without validating them again. All events of the
+        same MDASequence share one EDASequence, converted once, unless eda_sequence
+        is given. The metadata dict is copied shallowly.
+        """
+        sequences: dict[int, EDASequence] = {}
+        channels: dict[tuple[str, str], Channel] = {}
+        events: list[EDAEvent] = []
+        for mda_event in mda_events:
+            sequence = eda_sequence
+            if sequence is None and mda_event.sequence is not None:
+                key = id(mda_event.sequence)
+                if key not in sequences:
+                    sequences[key] = _to_eda_sequence(mda_event.sequence.model_dump())
+                sequence = sequences[key]
+            channel = None
+            if mda_event.channel is not None:
+                config, group = mda_event.channel.config, mda_event.channel.group
+                channel = channels.get((config, group))
+                if channel is None:
+                    channel = channels[config, group] = Channel(
+                        config=config, group=group
+                    )
+            properties = mda_event.properties
+            events.append(
+                cls.model_construct(
+                    index=None,
+                    attach_index=None,
+                    channel=channel,
+                    exposure=mda_event.exposure,
+                    min_start_time=mda_event.min_start_time,
+                    start_time_offset=None,
+                    x_pos=mda_event.x_pos,
+                    y_pos=mda_event.y_pos,
+                    z_pos=mda_event.z_pos,
+                    pos_index=None,
+                    pos_name=mda_event.pos_name,
+                    slm_image=mda_event.slm_image,
+                    sequence=sequence,
+                    properties=list(properties) if properties is not None else None,
+                    metadata=dict(mda_event.metadata),
+                    action=mda_event.action,
+                    keep_shutter_open=mda_event.keep_shutter_open,
+                    reset_event_timer=mda_event.reset_event_timer,
+                )
+            )
+        return events
+
+    def to_mda_event(
+        self, retain_min_start_time: bool = False, strict: bool | None = None
+    ) -> MDAEvent:
+        """Convert this EDAEvent to a useq.MDAEvent instance.
+
+        The fields of the EDAEvent are validated already, so by default the MDAEvent
+        is constructed from them without validating again. The sequence is converted
+        once per EDASequence and shared, the metadata dict is copied shallowly.
+        With strict (or EDAEvent.strict_conversion) the event is dumped and fully
+        validated instead.
+        """
+        if strict is None:
+            strict = self.strict_conversion
+        if strict:
+            return self._to_mda_event_strict(retain_min_start_time)
+
+        metadata = dict(self.metadata)
+        min_start_time = self.min_start_time
+        if not retain_min_start_time:
+            metadata["dynamic_start_time"] = min_start_time
+            min_start_time = None
+        sequence = self.sequence
+        if isinstance(sequence, EDASequence):
+            sequence = sequence.to_mda_sequence()
+        channel = None
+        if self.channel is not None:
+            channel = EventChannel.model_construct(
+                config=self.channel.config, group=self.channel.group
+            )
+        return MDAEvent.model_construct(
+            index=ReadOnlyDict(self.index or {}),
+            channel=channel,
+            exposure=self.exposure,
+            min_start_time=min_start_time,
+            pos_name=self.pos_name,
+            x_pos=self.x_pos,
+            y_pos=self.y_pos,
+            z_pos=self.z_pos,
+            slm_image=self.slm_image,
+            sequence=sequence,
+            properties=list(self.properties) if self.properties is not None else None,
+            metadata=metadata,
+            action=self.action,
+            keep_shutter_open=self.keep_shutter_open,
+            reset_event_timer=self.reset_event_timer,
+        )
+
+    def _to_mda_event_strict(self, retain_min_start_time: bool) -> MDAEvent:
         event_dict = self.model_dump()
+        event_dict["index"] = event_dict["index"] or {}
         if not retain_min_start_time:
             event_dict["metadata"]["dynamic_start_time"] = event_dict["min_start_time"]
             event_dict["min_start_time"] = None
@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import Field, field_validator
+from pydantic import Field, PrivateAttr, field_validator
 from useq import Channel, MDASequence
 from useq._base_model import MutableModel
 
@@ -56,6 +56,20 @@ class EDASequence(MutableModel):
     properties: dict[str, Any] = Field(default_factory=dict)
     metadata: dict[str, Any] = Field(default_factory=dict)
 
+    # MDASequence the events of this sequence refer to, see to_mda_sequence
+    _mda_sequence: MDASequence | None = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._mda_sequence = None
+
+    def to_mda_sequence(self) -> MDASequence:
+        """MDASequence with the fields both share, converted once and cached."""
+        if self._mda_sequence is None:
+            self._mda_sequence = MDASequence.model_validate(self.model_dump())
+        return self._mda_sequence
+
     def get_channel_index(self, channel_config: str) -> int | None:
         """Get the index of a channel in the sequence."""
         try:
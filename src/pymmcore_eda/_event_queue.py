@@ -1,5 +1,7 @@
 import threading
 from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
 
 from sortedcontainers import SortedSet
 from useq import Channel
@@ -8,15 +10,26 @@ from pymmcore_eda._eda_event import EDAEvent
 from pymmcore_eda._eda_sequence import EDASequence
 from pymmcore_eda._logger import logger
 
+# Fields of the events with a secondary index in the queue
+INDEXED_FIELDS = ("actuator_id", "channel", "pos_index", "pos_name")
+# Dimensions whose values compact retires, with the field of the event they are in
+_RETIRABLE_DIMS = {"z": "z_pos", "p": "pos_index", "g": "pos_name"}
+
 
 class DynamicEventQueue:
     """An event queue for Dynamic acquisitions.
 
     it tracks unique dimension values and allows indexing by ordinal position.
+    Times are quantised to integer ticks of 1 / ticks_per_second internally, so
+    times that only differ by floating point error fall on the same time point.
     """
 
-    def __init__(self) -> None:
-        self._events = SortedSet()
+    def __init__(self, ticks_per_second: int = 1_000_000) -> None:
+        self.ticks_per_second = ticks_per_second
+        # Sort on the cached key of the events, instead of calling __lt__ for every
+        # comparison during insertion.
+        self._axis_order: tuple[str, ...] = ("t", "p", "g", "c", "z")
+        self._events = self._new_container()
 
         self._unique_indexes: dict[str, SortedSet[int]] = {
             "t": SortedSet(),
@@ -26,64 +39,261 @@ class DynamicEventQueue:
         }
         # Channels are special, as they are not integers
         self._channels: tuple[str, ...] = ()
-
-        self._events_by_time: dict[float, list[EDAEvent]] = defaultdict(list)
+        self._channel_indexes: dict[str, int] = {}
+
+        # Events per time point in ticks, as dicts to find duplicates by hash in O(1).
+        # The values are the queued events themselves, to tell them from equal ones.
+        self._events_by_time: dict[int | None, dict[EDAEvent, EDAEvent]] = defaultdict(
+            dict
+        )
+        # Secondary indexes of the pending events, see find
+        self._field_indexes: dict[str, dict[Any, dict[EDAEvent, None]]] = {
+            field: defaultdict(dict) for field in INDEXED_FIELDS
+        }
+        # Number of pending events per z, p and g value. Values of the sequence are
+        # pinned, the others can be retired by compact once no event uses them.
+        self._value_refs: dict[str, dict[Any, int]] = {d: {} for d in _RETIRABLE_DIMS}
+        self._pinned: dict[str, set[Any]] = {d: set() for d in _RETIRABLE_DIMS}
+        # Compact after every compact_every consumed time points, None to disable
+        self.compact_every: int | None = None
         self._t_index = 0  # Sequential index counter
         self.sequence = None
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()
 
-    def add(self, event: EDAEvent) -> None:
-        """Add an event to the queue, resolving any dimension indices in the event."""
-        with self._lock:
-            if event.sequence and not self.sequence:
-                self._apply_sequence(event.sequence)
-            if event.attach_index:
-                self._apply_dimension_indices(event)
-            # Offset time relative
-            if event.start_time_offset:
-                event.min_start_time += event.start_time_offset
+    def add(self, event: EDAEvent) -> bool:
+        """Add an event to the queue, resolving any dimension indices in the event.
 
+        Returns False if the event was rejected as a duplicate.
+        """
+        with self._lock:
+            if not self._prepare(event):
+                return False
             self._events.add(event)
+            return True
 
-            if event not in self._events_by_time[event.min_start_time]:
-                self._events_by_time[event.min_start_time].append(event)
-                self._update_unique_sets(event)
-            else:
-                logger.info(f"Event rejected, already in queue {event}")
-                logger.info(self._events_by_time[event.min_start_time])
+    def add_many(self, events: Iterable[EDAEvent]) -> list[bool]:
+        """Add many events, taking the lock once and merging them in one pass.
+
+        The events are resolved in the given order, like with repeated add, so
+        attach_index can refer to events earlier in the same call. Returns for every
+        event whether it was added, False for rejected duplicates.
+        """
+        with self._lock:
+            events = list(events)
+            added = [self._prepare(event) for event in events]
+            self._events.update(
+                [event for event, ok in zip(events, added, strict=True) if ok]
+            )
+            return added
+
+    def _prepare(self, event: EDAEvent) -> bool:
+        """Resolve the event and index it by time, False if it is a duplicate."""
+        if event.sequence and not self.sequence:
+            self._apply_sequence(event.sequence)
+        if event.attach_index:
+            self._apply_dimension_indices(event)
+        # Offset time relative
+        if event.start_time_offset:
+            event.min_start_time += event.start_time_offset
+
+        ticks = self._to_ticks(event.min_start_time)
+        if ticks is not None:
+            # Snap the time of the event to its tick
+            seconds = ticks / self.ticks_per_second
+            if seconds != event.min_start_time:
+                event.min_start_time = seconds
+        bucket = self._events_by_time[ticks]
+        if event not in bucket:
+            bucket[event] = event
+            self._update_unique_sets(event)
+            self._index_fields(event)
+            return True
+        logger.info(f"Event rejected, already in queue {event}")
+        logger.info(list(bucket))
+        return False
 
     def remove(self, event: EDAEvent) -> None:
         """Remove an event from the queue."""
         with self._lock:
             if event in self._events:
                 self._events.remove(event)
-            if event.min_start_time is not None:
-                self._events_by_time[event.min_start_time].remove(event)
-                if len(self._events_by_time[event.min_start_time]) == 0:
-                    del self._events_by_time[event.min_start_time]
-                    self._unique_indexes["t"].remove(event.min_start_time)
-                    self._t_index += 1
-            else:
+            self._unindex_fields(event)
+            self._release_values(event)
+            ticks = self._to_ticks(event.min_start_time)
+            bucket = self._events_by_time.get(ticks, {})
+            bucket.pop(event, None)
+            if len(bucket) == 0:
+                self._events_by_time.pop(ticks, None)
+                self._unique_indexes["t"].discard(ticks)
+            # Events without time consume a time point each
+            if ticks is None or len(bucket) == 0:
                 self._t_index += 1
+                if self.compact_every and self._t_index % self.compact_every == 0:
+                    self.compact()
+
+    def discard(self, event: EDAEvent) -> bool:
+        """Take a pending event out of the queue in O(log n).
+
+        Only this very event is removed, not an equal one. Unlike remove, the event
+        is not consumed, so the time index does not advance if its time point empties.
+        Returns False if the event is not in the queue.
+        """
+        with self._lock:
+            if not self.is_queued(event):
+                return False
+            self._events.remove(event)
+            self._unindex_fields(event)
+            self._release_values(event)
+            ticks = self._to_ticks(event.min_start_time)
+            bucket = self._events_by_time[ticks]
+            del bucket[event]
+            if len(bucket) == 0:
+                del self._events_by_time[ticks]
+                if ticks is not None:
+                    self._unique_indexes["t"].remove(ticks)
+            return True
+
+    def reschedule(self, event: EDAEvent, min_start_time: float) -> bool:
+        """Move a pending event to min_start_time, in O(log n).
+
+        The new time is absolute, attach_index and start_time_offset are dropped.
+        Returns False if the event is not in the queue, or if it is a duplicate of an
+        event at the new time, in which case it is dropped.
+        """
+        with self._lock:
+            if not self.discard(event):
+                return False
+            event.attach_index = None
+            event.start_time_offset = None
+            event.min_start_time = min_start_time
+            return self.add(event)
+
+    def find(
+        self,
+        actuator_id: str | None = None,
+        channel: str | None = None,
+        pos_index: int | None = None,
+        pos_name: str | None = None,
+    ) -> list[EDAEvent]:
+        """Pending events that match all given criteria, in the order of the queue.
+
+        Uses the secondary indexes, so the cost depends on the number of matching
+        events instead of the size of the queue. Criteria that are None match any
+        event. channel is the config name of the channel.
+        """
+        criteria = {
+            "actuator_id": actuator_id,
+            "channel": channel,
+            "pos_index": pos_index,
+            "pos_name": pos_name,
+        }
+        with self._lock:
+            matches = sorted(
+                (
+                    self._field_indexes[field].get(value, {})
+                    for field, value in criteria.items()
+                    if value is not None
+                ),
+                key=len,
+            )
+            if not matches:
+                return list(self._events)
+            smallest, *others = matches
+            events = [e for e in smallest if all(e in other for other in others)]
+            return sorted(events, key=self.sort_key)
+
+    def discard_many(
+        self,
+        actuator_id: str | None = None,
+        channel: str | None = None,
+        pos_index: int | None = None,
+        pos_name: str | None = None,
+    ) -> list[EDAEvent]:
+        """Take all pending events that match the criteria of find out of the queue.
+
+        Returns the removed events. Like discard, time indexes do not advance.
+        """
+        with self._lock:
+            events = self.find(actuator_id, channel, pos_index, pos_name)
+            for event in events:
+                self.discard(event)
+            return events
+
+    def _index_fields(self, event: EDAEvent) -> None:
+        for field, value in self._field_values(event):
+            self._field_indexes[field][value][event] = None
+
+    def _unindex_fields(self, event: EDAEvent) -> None:
+        for field, value in self._field_values(event):
+            index = self._field_indexes[field]
+            events = index.get(value)
+            if events is None:
+                continue
+            events.pop(event, None)
+            if len(events) == 0:
+                del index[value]
+
+    def _field_values(self, event: EDAEvent) -> list[tuple[str, Any]]:
+        values = [
+            ("actuator_id", event.actuator_id),
+            ("channel", event.channel.config if event.channel else None),
+            ("pos_index", event.pos_index),
+            ("pos_name", event.pos_name),
+        ]
+        return [(field, value) for field, value in values if value is not None]
+
+    def is_next(self, event: EDAEvent) -> bool:
+        """Whether this very event is at the head of the queue."""
+        with self._lock:
+            return len(self._events) > 0 and self._events[0] is event
+
+    def is_queued(self, event: EDAEvent) -> bool:
+        """Whether this very event is pending in the queue, in O(1)."""
+        with self._lock:
+            bucket = self._events_by_time.get(self._to_ticks(event.min_start_time))
+            # An equal event might be queued instead of this one
+            return bucket is not None and bucket.get(event) is event
 
     def clear(self) -> None:
         """Clear the event queue."""
         with self._lock:
             self._events.clear()
             self._events_by_time.clear()
+            for index in self._field_indexes.values():
+                index.clear()
+            for refs in self._value_refs.values():
+                refs.clear()
 
     def _apply_sequence(self, sequence: EDASequence) -> None:
         """Apply the sequence to the event queue."""
         self.sequence = sequence
+        if hasattr(sequence, "axis_order") and sequence.axis_order:
+            axis_order = tuple(sequence.axis_order)
+            if axis_order != self._axis_order:
+                self._axis_order = axis_order
+                # Events already in the queue have to be re-keyed
+                self._events = self._new_container(self._events)
         # Initialize unique indexes based on the sequence
         if hasattr(sequence, "channels"):
             self._channels = tuple(c.config for c in sequence.channels)
+            self._channel_indexes = {c: i for i, c in enumerate(self._channels)}
         if hasattr(sequence, "z_positions"):
             self._unique_indexes["z"] = SortedSet(sequence.z_positions)
+            self._pinned["z"] = set(sequence.z_positions)
         if hasattr(sequence, "positions"):
             self._unique_indexes["p"] = SortedSet(sequence.positions)
+            self._pinned["p"] = set(sequence.positions)
         if hasattr(sequence, "grid_positions"):
             self._unique_indexes["g"] = SortedSet(sequence.grid_positions)
+            self._pinned["g"] = set(sequence.grid_positions)
+
+    def _new_container(self, events: Iterable[EDAEvent] = ()) -> SortedSet:
+        """Ordered container of the pending events, keyed by sort_key."""
+        return SortedSet(events, key=self.sort_key)
+
+    def sort_key(self, event: EDAEvent) -> tuple[float | str, ...]:
+        """Key of the event in the queue, all events share the queue's axis_order."""
+        return event.get_sort_key(self._axis_order)
 
     def _apply_dimension_indices(self, event: EDAEvent) -> EDAEvent:
         """Apply dimensional indices from event.attach_index to set actual values."""
@@ -108,36 +318,101 @@ class DynamicEventQueue:
     def _update_unique_sets(self, event: EDAEvent) -> None:
         """Update the unique value sets with values from this event."""
         if event.min_start_time is not None:
-            self._unique_indexes["t"].add(event.min_start_time)
-        if event.channel and event.channel.config not in self._channels:
+            self._unique_indexes["t"].add(self._to_ticks(event.min_start_time))
+        if event.channel and event.channel.config not in self._channel_indexes:
+            self._channel_indexes[event.channel.config] = len(self._channels)
             self._channels = (*self._channels, event.channel.config)
-        if event.z_pos is not None:
-            self._unique_indexes["z"].add(event.z_pos)
-        if event.pos_index is not None:
-            self._unique_indexes["p"].add(event.pos_index)
-        if event.pos_name is not None:
-            self._unique_indexes["g"].add(event.pos_name)
+        for dim, field in _RETIRABLE_DIMS.items():
+            value = getattr(event, field)
+            if value is None:
+                continue
+            self._unique_indexes[dim].add(value)
+            refs = self._value_refs[dim]
+            refs[value] = refs.get(value, 0) + 1
+
+    def _release_values(self, event: EDAEvent) -> None:
+        """Count down the z, p and g values of an event that leaves the queue."""
+        for dim, field in _RETIRABLE_DIMS.items():
+            value = getattr(event, field)
+            refs = self._value_refs[dim]
+            if value is None or value not in refs:
+                continue
+            refs[value] -= 1
+            if refs[value] == 0:
+                del refs[value]
+
+    def compact(self) -> None:
+        """Retire the z, p and g values that no pending event uses anymore.
+
+        Values of the sequence are kept. In long-running acquisitions with values
+        added by smart events the unique sets stay bounded by the pending events.
+        Consumed time points are retired as soon as they are dispatched, index["t"]
+        keeps counting on. attach_index refers to the positions of the values that
+        are left, like for time points. The retired values are found from the
+        reference counts, so nothing accumulates while compaction is not used.
+        """
+        with self._lock:
+            for dim, refs in self._value_refs.items():
+                unique = self._unique_indexes[dim]
+                pinned = self._pinned[dim]
+                retired = [v for v in unique if v not in refs and v not in pinned]
+                for value in retired:
+                    unique.discard(value)
 
     def get_next(self) -> EDAEvent | None:
         """Get the next event from the queue (first in order)."""
-        if len(self._events) == 0:
-            return None
-        event = self._events.pop(0)
-        # Generate and assign integer indexes before returning the event
-        event = self._assign_integer_indexes(event)
-        self.remove(event)
-        return event
+        with self._lock:
+            if len(self._events) == 0:
+                return None
+            event = self._events.pop(0)
+            # Generate and assign integer indexes before returning the event
+            event = self._assign_integer_indexes(event)
+            self.remove(event)
+            return event
+
+    def get_next_batch(self) -> list[EDAEvent]:
+        """Get the events at the head of the queue that share its min_start_time.
+
+        Only the consecutive run of events with the same time is returned, so the
+        order of the queue is kept also for axis orders that do not start with t.
+        Events that reset the event timer are always returned on their own.
+        """
+        with self._lock:
+            if len(self._events) == 0:
+                return []
+            head = self._events[0]
+            batch = [self.get_next()]
+            if head.reset_event_timer:
+                return batch  # type: ignore
+            # At most the rest of the events in the same time bucket can follow
+            head_ticks = self._to_ticks(head.min_start_time)
+            for _ in range(len(self._events_by_time.get(head_ticks, ()))):
+                if len(self._events) == 0:
+                    break
+                following = self._events[0]
+                if (
+                    self._to_ticks(following.min_start_time) != head_ticks
+                    or following.reset_event_timer
+                ):
+                    break
+                batch.append(self.get_next())
+            return batch  # type: ignore
 
     def peak_next(self) -> EDAEvent | None:
-        """Peek at the next event in the queue without removing it."""
-        if len(self._events) == 0:
-            return None
+        """Peek at the next event in the queue without removing it.
 
-        event = self._events[0]
-        # Generate and assign integer indexes before returning a copy of the event
-        event_copy = event.model_copy()
-        event_copy = self._assign_integer_indexes(event_copy)
-        return event_copy
+        Takes the lock like the other reads, finding the head can reorganise the
+        container, e.g. merge pending events in the array backend.
+        """
+        with self._lock:
+            if len(self._events) == 0:
+                return None
+
+            event = self._events[0]
+            # Generate and assign integer indexes before returning a copy of the event
+            event_copy = event.model_copy()
+            event_copy = self._assign_integer_indexes(event_copy)
+            return event_copy
 
     def _assign_integer_indexes(self, event: EDAEvent) -> EDAEvent:
         """Assign integer indexes to the event based on its dimension values."""
@@ -177,20 +452,28 @@ class DynamicEventQueue:
         return event
 
     def _get_index_of_value(self, dim: str, value: float | str | Channel) -> int | None:
-        """Get the integer index of a value in a dimension's unique set."""
-        if dim in self._unique_indexes and value in self._unique_indexes[dim]:
-            values_list = self._unique_indexes[dim]
-            return int(values_list.index(value))
-        elif dim == "c" and value in self._channels:
-            return self._channels.index(value)
+        """Get the integer index of a value in a dimension's unique set.
+
+        O(1) for channels and O(log n) for the sorted dimensions.
+        """
+        if dim == "t":
+            value = self._to_ticks(value)  # type: ignore
+        if dim in self._unique_indexes:
+            values = self._unique_indexes[dim]
+            if value in values:
+                return int(values.index(value))
+        elif dim == "c":
+            return self._channel_indexes.get(value)  # type: ignore
         return None
 
     def get_value_at_index(self, dim: str, index: int) -> int | str | None | float:
-        """Get the value at a specific index for a dimension."""
-        if dim in self._unique_indexes.keys():
+        """Get the value at a specific index for a dimension in O(log n)."""
+        if dim in self._unique_indexes:
             values = self._unique_indexes[dim]
-            if index < len(values):
-                return list(values)[index]  # type: ignore
+            if -len(values) <= index < len(values):
+                if dim == "t":
+                    return values[index] / self.ticks_per_second  # type: ignore
+                return values[index]  # type: ignore
         elif dim == "c":
             return self._channels[index] if 0 <= index < len(self._channels) else None
         return None
@@ -199,15 +482,27 @@ class DynamicEventQueue:
         """Get all unique values for a dimension."""
         if dim == "c":
             return self._channels
-        elif dim in ("t", "z", "p", "g"):
-            return list(self._unique_indexes[dim])
-        else:
-            return []
+        with self._lock:
+            if dim == "t":
+                return [
+                    ticks / self.ticks_per_second for ticks in self._unique_indexes[dim]
+                ]
+            elif dim in ("z", "p", "g"):
+                return list(self._unique_indexes[dim])
+            else:
+                return []
 
     def get_events_at_time(self, timestamp: float) -> list[EDAEvent]:
         """Get all events scheduled at a specific timestamp."""
-        return self._events_by_time.get(timestamp, [])
+        with self._lock:
+            return list(self._events_by_time.get(self._to_ticks(timestamp), ()))
+
+    def _to_ticks(self, seconds: float | None) -> int | None:
+        """Time in integer ticks, the key of the time point in the queue."""
+        if seconds is None:
+            return None
+        return round(seconds * self.ticks_per_second)
 
     def __len__(self) -> int:
         """Get the number of events in the queue."""
-        return len(tuple(self._events))
+        return len(self._events)
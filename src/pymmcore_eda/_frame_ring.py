@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+class FrameRing:
+    """A fixed number of preallocated frames, handed out slot by slot.
+
+    A slot is taken with put and stays reserved until it is released, so a frame is
+    never overwritten while a consumer still reads it. With shared=True the frames
+    live in shared memory that other processes open with attach, using spec.
+    Not thread safe, the owner serialises the calls.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        dtype: np.dtype | type | str,
+        n_slots: int,
+        shared: bool = False,
+    ) -> None:
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.n_slots = n_slots
+        self._shm: SharedMemory | None = None
+        if shared:
+            nbytes = max(1, n_slots * self.dtype.itemsize * int(np.prod(self.shape)))
+            self._shm = SharedMemory(create=True, size=nbytes)
+            self.frames = np.ndarray(
+                (n_slots, *self.shape), dtype=self.dtype, buffer=self._shm.buf
+            )
+        else:
+            self.frames = np.empty((n_slots, *self.shape), dtype=self.dtype)
+        self._free: deque[int] = deque(range(n_slots))
+
+    @property
+    def spec(self) -> tuple[str, tuple[int, ...], str, int]:
+        """Everything attach needs to open the shared frames in another process."""
+        if self._shm is None:
+            raise ValueError("Only a shared FrameRing can be attached")
+        return self._shm.name, self.shape, self.dtype.str, self.n_slots
+
+    @staticmethod
+    def attach(
+        spec: tuple[str, tuple[int, ...], str, int],
+    ) -> tuple[SharedMemory, np.ndarray]:
+        """Open the frames of a shared FrameRing, keep the SharedMemory referenced."""
+        name, shape, dtype, n_slots = spec
+        shm = SharedMemory(name=name)
+        frames = np.ndarray((n_slots, *shape), dtype=dtype, buffer=shm.buf)
+        return shm, frames
+
+    def fits(self, img: np.ndarray) -> bool:
+        """Whether img can be put into a slot."""
+        return img.shape == self.shape and img.dtype == self.dtype
+
+    def put(self, img: np.ndarray) -> int | None:
+        """Copy img into a free slot and reserve it, None if all slots are taken."""
+        slot = self.reserve()
+        if slot is not None:
+            np.copyto(self.frames[slot], img)
+        return slot
+
+    def reserve(self) -> int | None:
+        """Reserve a free slot for the caller to fill, None if all slots are taken."""
+        if not self._free:
+            return None
+        return self._free.popleft()
+
+    def release(self, slot: int) -> None:
+        """Give a slot back once its frame is not read anymore."""
+        self._free.append(slot)
+
+    @property
+    def n_free(self) -> int:
+        return len(self._free)
+
+    def close(self) -> None:
+        """Free the shared memory, the frames can not be used afterwards."""
+        if self._shm is not None:
+            del self.frames
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class FrameStack:
+    """The last n_frames frames in one contiguous array, oldest first.
+
+    Every frame is written twice, at its position in the ring and n_frames behind
+    it, so the last n_frames frames are always a contiguous slice of the buffer and
+    view hands them out without copying. The view is only valid until the next push.
+    """
+
+    def __init__(
+        self, n_frames: int, shape: tuple[int, ...], dtype: np.dtype | type | str
+    ) -> None:
+        self.n_frames = n_frames
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._buffer = np.zeros((2 * n_frames, *self.shape), dtype=self.dtype)
+        self._next = 0
+        self.n_pushed = 0
+
+    def push(self, img: np.ndarray) -> None:
+        """Copy img into the stack, replacing the oldest frame once it is full."""
+        np.copyto(self._buffer[self._next], img)
+        np.copyto(self._buffer[self._next + self.n_frames], img)
+        self._next = (self._next + 1) % self.n_frames
+        self.n_pushed += 1
+
+    def view(self) -> np.ndarray:
+        """Read-only view of the last frames, fewer than n_frames until it is full."""
+        n_valid = min(self.n_pushed, self.n_frames)
+        end = self._next + self.n_frames
+        view = self._buffer[end - n_valid : end]
+        view.flags.writeable = False
+        return view
+
+    def fits(self, img: np.ndarray) -> bool:
+        """Whether img can be pushed."""
+        return img.shape == self.shape and img.dtype == self.dtype
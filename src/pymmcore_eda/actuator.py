@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 
 from pymmcore_eda._eda_event import EDAEvent
 from pymmcore_eda._logger import logger
+from pymmcore_eda.time_machine import VirtualTimeMachine
 
 if TYPE_CHECKING:
     from typing import Any
@@ -17,11 +18,23 @@ if TYPE_CHECKING:
 
 
 class MDAActuator:
-    """Takes a MDASequence and sends events to the queue manager."""
+    """Takes a MDASequence and sends events to the queue manager.
 
-    def __init__(self, queue_manager: QueueManager, mda_sequence: MDASequence):
+    With a horizon (in seconds), events are only registered once the queue has
+    progressed to within horizon of their min_start_time, so the number of events
+    waiting in the queue stays bounded for long acquisitions.
+    """
+
+    def __init__(
+        self,
+        queue_manager: QueueManager,
+        mda_sequence: MDASequence,
+        horizon: float | None = None,
+    ):
         self.queue_manager = queue_manager
         self.mda_sequence = mda_sequence
+        self.horizon = horizon
+        self.poll_interval = 0.01
         self.wait = True
         self.thread = Thread(target=self._run)
 
@@ -29,14 +42,53 @@ class MDAActuator:
         self.settings = self.queue_manager.register_actuator(self, self.n_channels)
 
     def _run(self) -> None:
-        for event in self.mda_sequence:
-            self.queue_manager.register_event(event, self.settings.get("id", "0"))
+        actuator_id = self.settings.get("id", "0")
+        if self.horizon is None:
+            events = list(self.mda_sequence)
+            self.queue_manager.register_events(events, actuator_id)
+            event = events[-1]
+        else:
+            for event in self.mda_sequence:
+                if not self._wait_for_horizon(event):
+                    return
+                self.queue_manager.register_event(event, actuator_id)
         if self.wait:
-            if event.min_start_time:
+            if isinstance(self.queue_manager.time_machine, VirtualTimeMachine):
+                # A real sleep would take as long as the simulated acquisition
+                self._wait_for_dispatch(event)
+            elif event.min_start_time:
                 time.sleep(event.min_start_time + 3)
             else:
                 time.sleep(3)
 
+    def _wait_for_dispatch(self, event: MDAEvent) -> None:
+        """Wait until the queue has dispatched up to event or stopped."""
+        start_time = event.min_start_time or 0.0
+        while self.queue_manager.dispatched_time < start_time:
+            if self.queue_manager.canceled:
+                return
+            time.sleep(self.poll_interval)
+
+    def _wait_for_horizon(self, event: MDAEvent) -> bool:
+        """Wait until event is within the horizon, False if the queue stopped.
+
+        The horizon counts from the dispatched events or the clock, whichever is
+        further. Once the queue has drained the next event is always registered,
+        otherwise nothing would advance on a horizon shorter than the interval.
+        """
+        assert self.horizon is not None
+        start_time = event.min_start_time or 0.0
+        queue_manager = self.queue_manager
+        while len(queue_manager.event_queue) > 0:
+            now = max(
+                queue_manager.dispatched_time,
+                queue_manager.time_machine.event_seconds_elapsed(),
+            )
+            if start_time <= now + self.horizon or queue_manager.canceled:
+                break
+            time.sleep(self.poll_interval)
+        return not queue_manager.canceled
+
 
 class Actuator:
     """Actuator that subscribes to new_interpretation and reacts to incoming events."""
@@ -80,7 +132,7 @@ class ButtonActuator:
         while True:
             button = input()
             if button == "q":
-                print('button actuator stopped')
+                print("button actuator stopped")
                 self.queue_manager.stop_seq()
                 break
             event = EDAEvent(
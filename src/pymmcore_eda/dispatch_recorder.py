@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from os import PathLike
+    from typing import Any
+
+    from pymmcore_plus.mda.events import PMDASignaler
+    from useq import MDAEvent
+
+TIME_FIELDS = ("planned", "dispatched", "runner_start", "frame_ready")
+DTYPE = np.dtype(
+    [("id", np.int64)]
+    + [(f, np.float64) for f in TIME_FIELDS]
+    + [("actuator", np.int32)]
+)
+
+
+class DispatchRecorder:
+    """Ring buffer recording when events were due and when they were handled.
+
+    The QueueManager records the time an event was due and the time it was put on
+    the acquisition queue. Connected to the signals of the runner, the time the
+    runner started the event and the time its frame was ready are added. All times
+    are in seconds of the QueueManager's clock (time.perf_counter by default).
+    Memory is allocated once, the oldest records are overwritten when full.
+    """
+
+    def __init__(
+        self, capacity: int = 100_000, clock: Callable[[], float] | None = None
+    ) -> None:
+        self.capacity = capacity
+        self.clock = clock or time.perf_counter
+        self._records: np.ndarray = np.zeros(capacity, dtype=DTYPE)
+        self._records["id"] = -1
+        self._count = 0
+        self.actuators: dict[str | None, int] = {}
+
+    def __len__(self) -> int:
+        """Number of records currently held."""
+        return min(self._count, self.capacity)
+
+    def record_dispatch(
+        self,
+        planned: float,
+        dispatched: float = np.nan,
+        actuator_id: str | None = None,
+    ) -> int:
+        """Add an event that is dispatched, return the id of the record."""
+        record_id = self._count
+        record = self._records[record_id % self.capacity]
+        actuator = self.actuators.setdefault(actuator_id, len(self.actuators))
+        record["id"] = record_id
+        record["planned"] = planned
+        record["dispatched"] = dispatched
+        record["runner_start"] = np.nan
+        record["frame_ready"] = np.nan
+        record["actuator"] = actuator
+        self._count += 1
+        return record_id
+
+    def set_time(self, record_id: int | None, field: str, value: float) -> None:
+        """Set one of the times of a record, if it was not overwritten yet."""
+        if record_id is None:
+            return
+        record = self._records[record_id % self.capacity]
+        # The record might have been overwritten already
+        if record["id"] == record_id:
+            record[field] = value
+
+    def connect(self, events: PMDASignaler) -> None:
+        """Record runner times from the signals of a pymmcore-plus runner."""
+        events.eventStarted.connect(self.event_started)
+        events.frameReady.connect(self.frame_ready)
+
+    def event_started(self, event: MDAEvent) -> None:
+        """Slot for eventStarted of the runner."""
+        for sub_event in getattr(event, "events", None) or (event,):
+            record_id = sub_event.metadata.get("dispatch_id")
+            self.set_time(record_id, "runner_start", self.clock())
+
+    def frame_ready(self, _: Any, event: MDAEvent, __: Any = None) -> None:
+        """Slot for frameReady of the runner."""
+        self.set_time(event.metadata.get("dispatch_id"), "frame_ready", self.clock())
+
+    def to_numpy(self) -> np.ndarray:
+        """Structured array of the records, oldest first."""
+        if self._count <= self.capacity:
+            return self._records[: self._count].copy()
+        start = self._count % self.capacity
+        return np.concatenate((self._records[start:], self._records[:start]))
+
+    def to_csv(self, path: str | PathLike) -> None:
+        """Write the records to a csv file."""
+        records = self.to_numpy()
+        np.savetxt(
+            path,
+            records,
+            delimiter=",",
+            header=",".join(records.dtype.names),  # type: ignore
+            comments="",
+            fmt=["%d"] + ["%.6f"] * len(TIME_FIELDS) + ["%d"],
+        )
+
+    def latency(self, field: str = "dispatched") -> np.ndarray:
+        """Seconds from the planned time to field, for the records that have it."""
+        records = self.to_numpy()
+        latency = np.asarray(records[field] - records["planned"], dtype=float)
+        return np.asarray(latency[~np.isnan(latency)], dtype=float)
+
+    def histogram(
+        self, field: str = "dispatched", bins: int | np.ndarray = 50
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Histogram of the latency to field in milliseconds."""
+        return np.histogram(self.latency(field) * 1000, bins=bins)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Statistics of the latencies in milliseconds."""
+        summary = {}
+        for field in TIME_FIELDS[1:]:
+            latency = self.latency(field) * 1000
+            if latency.size == 0:
+                continue
+            summary[field] = {
+                "n": float(latency.size),
+                "mean": float(latency.mean()),
+                "std": float(latency.std()),
+                "p50": float(np.percentile(latency, 50)),
+                "p95": float(np.percentile(latency, 95)),
+                "p99": float(np.percentile(latency, 99)),
+                "max": float(latency.max()),
+            }
+        return summary
@@ -105,14 +105,22 @@ def dicts_equal(dict1: dict, dict2: dict) -> bool:
 
 
 def hash_dict(d: dict) -> str:
-    """Generate a hash for a dictionary, including NumPy arrays."""
-    d_copy = d.copy()
+    """Generate a hash for a dictionary, including (nested) NumPy arrays.
 
-    # Convert any NumPy arrays to a hashable representation
-    for key, value in d_copy.items():
-        if isinstance(value, np.ndarray):
-            d_copy[key] = (value.tobytes(), value.shape, value.dtype.str)
-
-    sorted_items = sorted(d_copy.items())
-    dict_str = json.dumps(sorted_items, sort_keys=True, default=str)
+    Arrays are represented by a digest of their data, shape and dtype, so their
+    values are never serialized.
+    """
+    dict_str = json.dumps(_hashable(d), sort_keys=True, default=str)
     return hashlib.md5(dict_str.encode()).hexdigest()
+
+
+def _hashable(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        data = np.ascontiguousarray(obj)
+        digest = hashlib.md5(data.tobytes())
+        return (digest.hexdigest(), obj.shape, obj.dtype.str)
+    elif isinstance(obj, dict):
+        return {k: _hashable(v) for k, v in obj.items()}
+    elif isinstance(obj, list | tuple):
+        return [_hashable(item) for item in obj]
+    return obj
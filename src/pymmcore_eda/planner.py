@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+from useq import MDASequence
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda._event_queue import DynamicEventQueue
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pymmcore_eda._eda_sequence import EDASequence
+    from pymmcore_eda.actuator import MDAActuator
+
+
+@dataclass
+class CostModel:
+    """Time the hardware needs for the different parts of an event, in seconds.
+
+    exposure_ms is used for events that don't define their own exposure.
+    """
+
+    exposure_ms: float = 10.0
+    readout: float = 0.0
+    channel_switch: float = 0.0
+    stage_move: float = 0.0
+    z_move: float = 0.0
+    tolerance: float = 0.01  # events starting later than this have missed their time
+
+    def overhead(self, event: EDAEvent, previous: EDAEvent | None) -> float:
+        """Time to get from the previous event to the start of the exposure."""
+        if previous is None:
+            return 0.0
+        overhead = 0.0
+        if _channel(event) != _channel(previous):
+            overhead += self.channel_switch
+        if (event.x_pos, event.y_pos, event.pos_index) != (
+            previous.x_pos,
+            previous.y_pos,
+            previous.pos_index,
+        ):
+            overhead += self.stage_move
+        if event.z_pos != previous.z_pos:
+            overhead += self.z_move
+        return overhead
+
+    def exposure(self, event: EDAEvent) -> float:
+        """Exposure of the event in seconds."""
+        exposure_ms = event.exposure
+        if exposure_ms is None and event.channel is not None:
+            exposure_ms = event.channel.exposure
+        return (exposure_ms or self.exposure_ms) / 1000
+
+
+@dataclass
+class PlannedEvent:
+    """An event on the predicted timeline, times in seconds of acquisition time.
+
+    delay is how long the runner is still busy with earlier time points when the
+    event is due. Events of the same time point are run one after the other, this
+    does not count as delay.
+    """
+
+    event: EDAEvent
+    planned: float
+    start: float
+    exposure_start: float
+    end: float
+    delay: float = 0.0
+
+
+@dataclass
+class TimelinePlan:
+    """Predicted timeline of an acquisition."""
+
+    events: list[PlannedEvent] = field(default_factory=list)
+    tolerance: float = 0.01
+
+    @property
+    def total_duration(self) -> float:
+        """Time until the last event is finished."""
+        return self.events[-1].end if self.events else 0.0
+
+    @property
+    def missed(self) -> list[PlannedEvent]:
+        """Events that will start later than their min_start_time."""
+        return [e for e in self.events if e.delay > self.tolerance]
+
+    def camera_load(self, bin_size: float = 1.0) -> np.ndarray:
+        """Fraction of every bin_size seconds that the camera is exposing."""
+        n_bins = max(math.ceil(self.total_duration / bin_size), 1)
+        load = np.zeros(n_bins)
+        for planned in self.events:
+            start, end = planned.exposure_start, planned.end
+            first, last = int(start // bin_size), int(end // bin_size)
+            for i in range(first, min(last, n_bins - 1) + 1):
+                bin_start = i * bin_size
+                overlap = min(end, bin_start + bin_size) - max(start, bin_start)
+                load[i] += max(overlap, 0.0)
+        return load / bin_size
+
+
+def plan_timeline(
+    actuators: Iterable[MDAActuator | MDASequence],
+    eda_sequence: EDASequence | None = None,
+    cost_model: CostModel | None = None,
+) -> TimelinePlan:
+    """Predict the timeline of the events the actuators will register.
+
+    The events are ordered in a DynamicEventQueue and taken out in batches of the
+    same time point, like the QueueManager dispatches them. Every event starts as
+    soon as the previous one is finished, but not before its min_start_time.
+    An event misses its min_start_time if the runner is still busy at that time.
+    Times are relative to the start of the acquisition, without the warmup of the
+    QueueManager. Events of smart actuators are not known in advance.
+    """
+    cost_model = cost_model or CostModel()
+    queue = DynamicEventQueue()
+    for actuator in actuators:
+        mda_sequence = (
+            actuator if isinstance(actuator, MDASequence) else actuator.mda_sequence
+        )
+        queue.add_many(EDAEvent.from_mda_events(mda_sequence, eda_sequence))
+
+    plan = TimelinePlan(tolerance=cost_model.tolerance)
+    clock = 0.0
+    previous: EDAEvent | None = None
+    time_point, delay = None, 0.0
+    while batch := queue.get_next_batch():
+        planned = batch[0].min_start_time or 0.0
+        if planned != time_point:
+            # A reset_event_timer event is its own batch, delay is per time point
+            time_point, delay = planned, max(clock - planned, 0.0)
+        for event in batch:
+            start = max(clock, planned)
+            exposure_start = start + cost_model.overhead(event, previous)
+            end = exposure_start + cost_model.exposure(event)
+            plan.events.append(
+                PlannedEvent(event, planned, start, exposure_start, end, delay)
+            )
+            clock = end + cost_model.readout
+            previous = event
+    return plan
+
+
+def _channel(event: EDAEvent) -> str | None:
+    return event.channel.config if event.channel else None
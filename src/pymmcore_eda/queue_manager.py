@@ -1,27 +1,44 @@
 from __future__ import annotations
 
+import time
 import uuid
+from collections import deque
 from queue import Queue
-from threading import Timer
+from threading import Condition, Thread
 from typing import TYPE_CHECKING, Any
 
+from pymmcore_plus.core import iter_sequenced_events
 from useq import MDAEvent
 
+from pymmcore_eda._array_event_queue import ArrayEventQueue
 from pymmcore_eda._eda_event import EDAEvent
 from pymmcore_eda._event_queue import DynamicEventQueue
+from pymmcore_eda.dispatch_recorder import DispatchRecorder
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from pymmcore_plus import CMMCorePlus
 
     from pymmcore_eda._eda_sequence import EDASequence
     from pymmcore_eda.actuator import MDAActuator  # should be generalized
 from pymmcore_eda.time_machine import TimeMachine
 
+# Implementations of the event queue, selected with queue_backend
+QUEUE_BACKENDS: dict[str, type[DynamicEventQueue]] = {
+    "sorted": DynamicEventQueue,
+    "array": ArrayEventQueue,
+}
+
 
 class QueueManager:
     """Component responsible to manage events and their timing in front of the Queue.
 
     Closer description in structure.md.
+    queue_backend selects the event queue from QUEUE_BACKENDS: "sorted" keeps the
+    events in a sorted list, "array" orders them in NumPy arrays, which is faster
+    for registering many events at once. ticks_per_second sets the resolution of
+    the event times in the queue, times closer than one tick share a time point.
     """
 
     def __init__(
@@ -29,6 +46,8 @@ class QueueManager:
         mmcore: CMMCorePlus | None = None,
         eda_sequence: EDASequence | None = None,
         time_machine: TimeMachine | None = None,
+        queue_backend: str = "sorted",
+        ticks_per_second: int = 1_000_000,
     ):
         self.acq_queue: Queue = Queue()
         self.stop = object()
@@ -42,14 +61,41 @@ class QueueManager:
             self.mmc.mda.events.sequenceCanceled.connect(self.stop_seq)
         if not self.time_machine:
             self.time_machine = TimeMachine()
+        # A VirtualTimeMachine brings its own clock, that is advanced instead of
+        # waiting for deadlines.
+        self._clock = getattr(self.time_machine, "clock", time.perf_counter)
+        self._advance = getattr(self.time_machine, "advance", None)
 
+        # Events are handed to the runner this many seconds before they are due,
+        # carrying their target time, so the runner is ready when they start.
         self.preemptive = 0.0
+        # Take early events back from the acquisition queue if an event that has to
+        # run before them is registered while they wait for the runner.
+        self.retract_preempted = True
+        self._preempted: deque[tuple[EDAEvent, MDAEvent]] = deque()
+        self._retracted: deque[tuple[EDAEvent, MDAEvent]] = deque()
+        # Combine sequenceable events that are dispatched together into one
+        # SequencedEvent. None follows mmc.mda.engine.use_hardware_sequencing.
+        self.hardware_sequencing: bool | None = None
+        # Sleep until spin_window before the deadline and busy-wait for the rest.
+        # spin_window is the CPU time the dispatcher burns at most per dispatch.
+        self.precision_mode = False
+        self.spin_window = 0.002
+        # Planned and actual dispatch times, see start_recording
+        self.recorder: DispatchRecorder | None = None
         self.t_idx = 0
+        # min_start_time of the last dispatched events, the progress of the queue
+        self.dispatched_time = 0.0
         self.warmup = 3
         self.reset_correction = 0
         self.paused_time = 0.0
         self.next_time = None
-        self.event_queue = DynamicEventQueue()
+        if queue_backend not in QUEUE_BACKENDS:
+            raise ValueError(
+                f"Unknown queue_backend {queue_backend!r}, "
+                f"expected one of {list(QUEUE_BACKENDS)}"
+            )
+        self.event_queue = QUEUE_BACKENDS[queue_backend](ticks_per_second)
         self.can_reset = True
         self.canceled = False
 
@@ -57,7 +103,18 @@ class QueueManager:
 
         self.eda_sequence = eda_sequence
         self._axis_max: dict[str, int] = {}
-        self.timer = Timer(0, self._queue_next_event)
+
+        # A single long-lived dispatcher thread waits for the deadline of the next
+        # event. Registering a new head of the queue, pausing or stopping re-arms it
+        # through the condition instead of creating a new Timer for every event.
+        self._wakeup = Condition()
+        self._deadline: float | None = None
+        self._dispatch_due = 0.0
+        self._paused = False
+        self._dispatcher = Thread(
+            target=self._dispatch_loop, name="QueueManagerDispatcher", daemon=True
+        )
+        self._dispatcher.start()
 
     def register_actuator(
         self, actuator: MDAActuator, n_channels: int = 1
@@ -83,16 +140,14 @@ class QueueManager:
             event = EDAEvent().from_mda_event(event, self.eda_sequence)
         if self.eda_sequence and event.sequence is None:
             event.sequence = self.eda_sequence
+        event.actuator_id = actuator_id
 
         if event.reset_event_timer and actuator_id in self.actuators.keys():
             event.reset_event_timer = self.actuators[actuator_id]["can_reset"]
 
         # Offset time absolute
         if event.min_start_time and event.min_start_time < 0.0:
-            start = self.time_machine.event_seconds_elapsed() + abs(
-                event.min_start_time
-            )
-            event.min_start_time = start
+            event.min_start_time = self._absolute_time(event.min_start_time)
 
         if event.reset_event_timer and self.t_idx > 0:
             self.warmup = 0
@@ -100,32 +155,314 @@ class QueueManager:
 
         return event
 
+    def _absolute_time(self, min_start_time: float) -> float:
+        """Negative times are offsets from now, turn them into acquisition time."""
+        if min_start_time >= 0.0:
+            return min_start_time
+        return self.time_machine.event_seconds_elapsed() + abs(min_start_time)
+
     def register_event(
         self, event: MDAEvent | EDAEvent, actuator_id: str = "0"
-    ) -> None:
-        """Actuators call this to request an event to be put on the event_register."""
+    ) -> EventHandle | None:
+        """Actuators call this to request an event to be put on the event_register.
+
+        The returned handle cancels or reschedules the event while it is pending.
+        None is returned if the event was rejected as a duplicate of a queued event,
+        which stays owned by whoever registered it.
+        """
         event = self.prepare_event(event, actuator_id)
-        self.event_queue.add(event)
+        if not self.event_queue.add(event):
+            return None
+        if self._preempted and self.retract_preempted:
+            self._retract_preempted(event)
         if event == self.event_queue.peak_next():
             self._reset_timer()
+        return EventHandle(self, event)
+
+    def register_events(
+        self, events: Iterable[MDAEvent | EDAEvent], actuator_id: str = "0"
+    ) -> list[EventHandle | None]:
+        """Register many events at once, e.g. all events of an MDASequence.
+
+        MDAEvents are converted together, sharing one EDASequence, and all events are
+        merged into the event_queue in one pass. The timer is re-armed at most once.
+        Like with register_event, the handle of a rejected duplicate is None.
+        """
+        events = list(events)
+        mda_events = [event for event in events if isinstance(event, MDAEvent)]
+        converted = iter(EDAEvent.from_mda_events(mda_events, self.eda_sequence))
+        prepared = [
+            self.prepare_event(
+                next(converted) if isinstance(event, MDAEvent) else event, actuator_id
+            )
+            for event in events
+        ]
+        if not prepared:
+            return []
+        added = self.event_queue.add_many(prepared)
+        handles = [
+            EventHandle(self, event) if ok else None
+            for event, ok in zip(prepared, added, strict=True)
+        ]
+        if not any(added):
+            return handles
+        first = min(
+            (handle.event for handle in handles if handle is not None),
+            key=self.event_queue.sort_key,
+        )
+        if self._preempted and self.retract_preempted:
+            self._retract_preempted(first)
+        if first == self.event_queue.peak_next():
+            self._reset_timer()
+        return handles
+
+    def cancel_event(self, event: EDAEvent) -> bool:
+        """Take a pending event out of the queue, False if it was dispatched already.
+
+        The dispatcher is only re-armed if the event was the next one.
+        """
+        with self._wakeup:
+            was_next = self.event_queue.is_next(event)
+            if not self.event_queue.discard(event):
+                return False
+            if was_next:
+                self._reset_timer()
+            return True
+
+    def cancel_events(
+        self,
+        actuator_id: str | None = None,
+        channel: str | None = None,
+        pos_index: int | None = None,
+        pos_name: str | None = None,
+    ) -> list[EDAEvent]:
+        """Cancel all pending events that match the given criteria.
+
+        E.g. cancel_events(actuator_id, channel="FITC", pos_index=3) drops the FITC
+        events an actuator planned at position 3, using the indexes of the queue.
+        Criteria that are None match any event. Returns the canceled events.
+        """
+        with self._wakeup:
+            events = self.event_queue.find(actuator_id, channel, pos_index, pos_name)
+            # The events are in queue order, only the first can be the head
+            was_next = bool(events) and self.event_queue.is_next(events[0])
+            events = [event for event in events if self.event_queue.discard(event)]
+            if was_next:
+                self._reset_timer()
+            return events
+
+    def reschedule_event(self, event: EDAEvent, new_time: float) -> bool:
+        """Move a pending event to new_time, False if it was dispatched already.
+
+        Negative times are offsets from now, like for registered events. The
+        dispatcher is only re-armed if the head of the queue changed.
+        """
+        new_time = self._absolute_time(new_time)
+        with self._wakeup:
+            was_next = self.event_queue.is_next(event)
+            if not self.event_queue.reschedule(event, new_time):
+                if was_next:
+                    self._reset_timer()
+                return False
+            if self._preempted and self.retract_preempted:
+                self._retract_preempted(event)
+            if was_next or self.event_queue.is_next(event):
+                self._reset_timer()
+            return True
+
+    def _dispatch_loop(self) -> None:
+        """Wait for the deadline of the next event and queue it, until canceled."""
+        with self._wakeup:
+            while not self.canceled:
+                if self._deadline is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._deadline - self._clock()
+                if remaining > 0:
+                    self._wait(remaining)
+                    continue
+                self._dispatch_due, self._deadline = self._deadline, None
+                self._queue_next_event()
 
     def _queue_next_event(self) -> None:
-        """Queue the next event."""
-        eda_event = self.event_queue.get_next()
-        if not eda_event:
+        """Queue the next event, together with all that are due at the same time."""
+        if self._retracted_due():
+            self._requeue_retracted()
+            self._reset_timer()
+            return
+        eda_events = self.event_queue.get_next_batch()
+        if not eda_events:
             self.stop_seq()
             return
-        event = eda_event.to_mda_event()
-        self.acq_queue.put(event)
-        wait = 0.05 if event.reset_event_timer else 0.0
+        self.dispatched_time = eda_events[0].min_start_time or 0.0
+        events = [self._to_runner_event(eda_event) for eda_event in eda_events]
+        for eda_event, event in self._sequence_events(eda_events, events):
+            self.acq_queue.put(event)
+            if self.preemptive > 0:
+                self._preempted.append((eda_event, event))
+        if self.recorder is not None:
+            now = self._clock()
+            for event in events:
+                self.recorder.set_time(
+                    event.metadata.get("dispatch_id"), "dispatched", now
+                )
+        if event.reset_event_timer and self._advance is not None:
+            # On a simulated clock the runner starts the event when it is dispatched
+            self.time_machine.consume_event(event)
         if not self.canceled:
-            Timer(wait, self._reset_timer).start()
+            if event.reset_event_timer:
+                # Give the runner time to reset its timer before timing the next one
+                self._hold(0.05)
+            self._reset_timer()
             self.t_idx = event.index.get("t", 0)
 
+    def _to_runner_event(self, eda_event: EDAEvent) -> MDAEvent:
+        """Convert the event, attaching the runner time it is due if sent early."""
+        event = eda_event.to_mda_event()
+        if self.preemptive > 0 and not event.reset_event_timer:
+            target = event.metadata["dynamic_start_time"] or 0.0
+            event = event.model_copy(
+                update={"min_start_time": target - self.reset_correction}
+            )
+        if self.recorder is not None:
+            event.metadata["dispatch_id"] = self.recorder.record_dispatch(
+                self._planned_time(eda_event), actuator_id=eda_event.actuator_id
+            )
+        return event
+
+    def _planned_time(self, eda_event: EDAEvent) -> float:
+        """Time on the clock of the QueueManager at which the event was due."""
+        if eda_event.reset_event_timer:
+            return self._dispatch_due
+        return (
+            self._clock()
+            + (eda_event.min_start_time or 0.0)
+            - self.time_machine.event_seconds_elapsed()
+            - self.reset_correction
+            + self.paused_time
+        )
+
+    def start_recording(self, capacity: int = 100_000) -> DispatchRecorder:
+        """Record planned and actual dispatch times of the events from now on."""
+        self.recorder = DispatchRecorder(capacity, clock=self._clock)
+        if self.mmc:
+            self.recorder.connect(self.mmc.mda.events)
+        return self.recorder
+
+    def _sequence_events(
+        self, eda_events: list[EDAEvent], events: list[MDAEvent]
+    ) -> list[tuple[EDAEvent, MDAEvent]]:
+        """Combine a batch of converted events for hardware sequencing.
+
+        Each runner event is paired with the first EDAEvent it contains. Smart events
+        can only be placed between the resulting runner events.
+        """
+        if len(events) < 2 or not self._use_hardware_sequencing():
+            return list(zip(eda_events, events, strict=True))
+        paired = []
+        i = 0
+        for event in iter_sequenced_events(self.mmc, events):  # type: ignore
+            paired.append((eda_events[i], event))
+            i += len(getattr(event, "events", ())) or 1
+        return paired
+
+    def _use_hardware_sequencing(self) -> bool:
+        if self.mmc is None:
+            return False
+        if self.hardware_sequencing is None:
+            return bool(self.mmc.mda.engine.use_hardware_sequencing)  # type: ignore
+        return self.hardware_sequencing
+
+    def _retract_preempted(self, new_event: EDAEvent) -> None:
+        """Take back early events from the acq_queue that new_event has to precede.
+
+        Events that the runner already picked up can not be retracted anymore, the new
+        event will follow them.
+        """
+        new_key = self.event_queue.sort_key(new_event)
+        with self._wakeup, self.acq_queue.mutex:
+            waiting = self.acq_queue.queue
+            waiting_ids = {id(event) for event in waiting}
+            self._preempted = deque(
+                item for item in self._preempted if id(item[1]) in waiting_ids
+            )
+            # Everything after the first event that new_event precedes is retracted
+            first = next(
+                (
+                    i
+                    for i, (eda_event, _) in enumerate(self._preempted)
+                    if new_key < self.event_queue.sort_key(eda_event)
+                ),
+                len(self._preempted),
+            )
+            while len(self._preempted) > first:
+                self._retracted.appendleft(self._preempted.pop())
+            if self._retracted:
+                retracted_ids = {id(event) for _, event in self._retracted}
+                kept = [event for event in waiting if id(event) not in retracted_ids]
+                waiting.clear()
+                waiting.extend(kept)
+
+    def _retracted_due(self) -> bool:
+        """Whether the first retracted event goes before the head of the event_queue."""
+        if not self._retracted:
+            return False
+        head = self.event_queue.peak_next()
+        return head is None or self.event_queue.sort_key(
+            self._retracted[0][0]
+        ) < self.event_queue.sort_key(head)
+
+    def _requeue_retracted(self) -> None:
+        """Put retracted events back on the acq_queue while they precede the head.
+
+        Events registered after the retraction can sort between the retracted ones,
+        the remaining retracted events wait until the events before them are queued.
+        """
+        while self._retracted_due():
+            eda_event, event = self._retracted.popleft()
+            self.acq_queue.put(event)
+            self._preempted.append((eda_event, event))
+
+    def _hold(self, duration: float) -> None:
+        """Block the dispatcher for duration, still reacting to stop_seq."""
+        until = self._clock() + duration
+        with self._wakeup:
+            while not self.canceled and (remaining := until - self._clock()) > 0:
+                self._wait(remaining)
+
+    def _wait(self, timeout: float) -> None:
+        """Wait on the wakeup condition, or advance a virtual clock to the deadline.
+
+        In precision_mode the last spin_window before the deadline is spent spinning
+        on the clock instead of sleeping, as sleeps overshoot by up to a few ms.
+        """
+        if self._advance is not None:
+            self._advance(timeout)
+        elif not self.precision_mode:
+            self._wakeup.wait(timeout)
+        elif timeout > self.spin_window:
+            self._wakeup.wait(timeout - self.spin_window)
+        else:
+            self._spin(timeout)
+
+    def _spin(self, timeout: float) -> None:
+        """Busy-wait for timeout, stopping early if the deadline is changed."""
+        deadline = self._deadline
+        until = self._clock() + timeout
+        while (
+            self._clock() < until and self._deadline == deadline and not self.canceled
+        ):
+            # Releases the lock for a moment, so events can still be registered
+            self._wakeup.wait(0)
+
     def stop_seq(self) -> None:
         """Stop the sequence after the events currently on the queue."""
-        self.canceled = True
-        self.timer.cancel()
+        with self._wakeup:
+            self.canceled = True
+            self._deadline = None
+            self._preempted.clear()
+            self._retracted.clear()
+            self._wakeup.notify_all()
         self.acq_queue.put(self.stop)
 
     def empty_queue(self) -> None:
@@ -136,10 +473,24 @@ class QueueManager:
             i += 1
 
     def _reset_timer(self) -> None:
-        """Set or reset the timer for an event."""
-        self.timer.cancel()
-        if len(self.event_queue) == 0:
-            return
+        """Set or reset the deadline of the dispatcher for the next event."""
+        with self._wakeup:
+            self._deadline = None
+            if self._paused or self.canceled:
+                return
+            if self._retracted_due():
+                self._deadline = self._clock()
+            elif len(self.event_queue) == 0:
+                return
+            else:
+                # Read the clock after elapsed time in _time_to_next_event, so the
+                # time taken in between delays the deadline instead of advancing it
+                delay = self._time_to_next_event()
+                self._deadline = self._clock() + delay
+            self._wakeup.notify()
+
+    def _time_to_next_event(self) -> float:
+        """Seconds until the event at the head of the queue has to be dispatched."""
         if self.time_machine and hasattr(self.time_machine, "consume_event"):
             self.time_machine.consume_event(self.event_queue.peak_next())
 
@@ -154,18 +505,45 @@ class QueueManager:
                 - self.time_machine.event_seconds_elapsed()
                 - self.reset_correction
                 + self.paused_time
-            )
+            ) - self.preemptive
 
-        self.timer = Timer(max(relative_time, 0.0), self._queue_next_event)
-        self.timer.start()
+        return max(relative_time, 0.0)
 
     def toggle_pause(self, paused: bool) -> None:
         """Toggle the pause state of the sequence."""
+        with self._wakeup:
+            self._paused = paused
         if paused:
-            self.timer.cancel()
+            self._reset_timer()
             self.paused_start = self.time_machine.event_seconds_elapsed()
         else:
             self.paused_time += (
                 self.time_machine.event_seconds_elapsed() - self.paused_start
             )
             self._reset_timer()
+
+
+class EventHandle:
+    """Handle to a registered event, returned by QueueManager.register_event.
+
+    Actuators use it to take back or move the event as long as it is pending in
+    the event_queue. Once dispatched, also early with preemptive, it can not be
+    changed anymore.
+    """
+
+    def __init__(self, queue_manager: QueueManager, event: EDAEvent) -> None:
+        self.queue_manager = queue_manager
+        self.event = event
+
+    def cancel(self) -> bool:
+        """Cancel the event, False if it was dispatched already."""
+        return self.queue_manager.cancel_event(self.event)
+
+    def reschedule(self, new_time: float) -> bool:
+        """Move the event to new_time in seconds, False if it was dispatched already."""
+        return self.queue_manager.reschedule_event(self.event, new_time)
+
+    @property
+    def pending(self) -> bool:
+        """Whether the event is still waiting in the event_queue."""
+        return self.queue_manager.event_queue.is_queued(self.event)
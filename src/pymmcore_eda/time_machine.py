@@ -13,7 +13,8 @@ class TimeMachine:
     """Component to sync time between the Runner in pymmcore-plus and QueueManager.
 
     This avoids having direct connections between the two components.
-    Like this seems to be accurate enough (10ms).
+    Like this seems to be accurate enough (10ms), QueueManager.start_recording
+    measures the actual timing.
     """
 
     def __init__(self) -> None:
@@ -31,3 +32,47 @@ class TimeMachine:
     def _reset_event_timer(self) -> None:
         """Reset the timer."""
         self._t0 = time.perf_counter()
+
+
+class VirtualTimeMachine(TimeMachine):
+    """TimeMachine on a simulated clock that jumps to the next deadline.
+
+    The QueueManager advances the clock instead of waiting when it is given a
+    VirtualTimeMachine, so acquisition plans can be run faster than real time, e.g.
+    with a MockRunner to check the scheduling of a protocol.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._t0 = start
+        # Simulated time of the last timer reset, runner threads reset to this time
+        self._reset_at = start
+
+    def clock(self) -> float:
+        """Current simulated time in seconds, replaces time.perf_counter."""
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """Move the simulated clock forward."""
+        self._now += max(seconds, 0.0)
+
+    def sleep(self, seconds: float) -> None:
+        """Simulated sleep, for actuators and tests that wait on the time machine."""
+        self.advance(seconds)
+
+    def consume_event(self, event: MDAEvent) -> None:
+        """Check for reset_event_timer and update the internal timer."""
+        if event.reset_event_timer:
+            self._t0 = self._reset_at = self._now
+
+    def event_seconds_elapsed(self, *_: Any) -> float:
+        """Simulated seconds since the last reset of the event timer."""
+        return self._now - self._t0
+
+    def _reset_event_timer(self) -> None:
+        """Reset the timer to the time the reset event was consumed.
+
+        A runner thread calls this whenever it gets to the event, by then the
+        simulated clock may have been advanced already.
+        """
+        self._t0 = self._reset_at
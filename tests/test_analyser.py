@@ -0,0 +1,209 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from psygnal import Signal, SignalGroup
+from useq import MDAEvent
+
+from pymmcore_eda import analyser as analyser_module
+from pymmcore_eda._frame_ring import FrameStack
+from pymmcore_eda.analyser import Analyser, AnalyserSettings
+from pymmcore_eda.event_hub import EventHub
+
+
+class RunnerEvents(SignalGroup):
+    frameReady = Signal(np.ndarray, MDAEvent, dict)
+
+
+@pytest.fixture
+def hub():
+    return EventHub(SimpleNamespace(events=RunnerEvents()))
+
+
+def emit_frames(hub, n_frames, start=0):
+    img = np.zeros((16, 16), dtype=np.uint16)
+    for t in range(start, start + n_frames):
+        hub.frameReady.emit(img, MDAEvent(index={"t": t, "c": 0}), {})
+
+
+@pytest.mark.parametrize(
+    "policy, dropped, analysed",
+    [
+        ("latest", {"replaced": 3}, 2),
+        ("fifo", {"full": 3}, 2),
+        ("every_nth", {"skipped": 2, "full": 1}, 2),
+    ],
+)
+def test_policies(hub, policy, dropped, analysed):
+    analyses = []
+    hub.new_analysis.connect(lambda img, event, meta: analyses.append(event))
+    analyser = Analyser(hub, prediction_time=0.2, policy=policy, max_queued=1)
+    # Let the worker pick up the first frame, the others arrive while it is busy
+    emit_frames(hub, 1)
+    time.sleep(0.05)
+    emit_frames(hub, 4, start=1)
+    assert analyser.join(timeout=2)
+    assert dict(analyser.dropped) == dropped
+    assert analyser.analysed == analysed == len(analyses)
+    if policy != "every_nth":
+        expected = [0, 4] if policy == "latest" else [0, 1]
+        assert [e.index["t"] for e in analyses] == expected
+    analyser.close()
+
+
+def test_frame_ring(hub):
+    analyses = []
+    hub.new_analysis.connect(lambda img, event, meta: analyses.append(img))
+    analyser = Analyser(hub, prediction_time=0.05, policy="fifo", max_queued=2)
+    # Preallocated for stacks of the crop of the default image_shape
+    assert analyser._frames.frames.shape == (3, 4, 512, 512)
+    # Frames that wait for the worker keep their slot until they are analysed
+    for t in range(3):
+        img = np.full((16, 16), t, dtype=np.uint16)
+        hub.frameReady.emit(img, MDAEvent(index={"t": t, "c": 0}), {})
+    assert analyser._frames.n_free == 0
+    assert analyser.join(timeout=2)
+    assert [output[0, 0] * 65535 for output in analyses] == pytest.approx([0, 1, 2])
+    assert analyser._frames.n_free == 3
+    analyser.close()
+
+
+def test_frame_stack():
+    stack = FrameStack(3, (2, 2), np.uint16)
+    assert stack.view().shape == (0, 2, 2)
+    for i in range(5):
+        stack.push(np.full((2, 2), i, dtype=np.uint16))
+        view = stack.view()
+        assert list(view[:, 0, 0]) == list(range(max(0, i - 2), i + 1))
+        assert view.flags.c_contiguous
+        assert not view.flags.writeable
+
+
+def test_temporal_stacks(hub):
+    settings = AnalyserSettings()
+    settings.n_frames_model = 2
+    settings.crop_size = 8
+    analyser = Analyser(hub, prediction_time=0, policy="fifo", settings=settings)
+    for t in range(3):
+        for p in range(2):
+            img = np.full((16, 16), 10 * p + t, dtype=np.uint16)
+            img[0, 0] = 1000  # outside of the crop
+            event = MDAEvent(index={"t": t, "p": p, "c": 0})
+            hub.frameReady.emit(img, event, {})
+            assert analyser.join(timeout=2)
+    stack = analyser.frame_stack(pos_index=1)
+    assert stack.shape == (2, 8, 8)
+    assert list(stack.max(axis=(1, 2))) == [11, 12]
+    assert list(analyser.frame_stack(pos_index=0).max(axis=(1, 2))) == [1, 2]
+    analyser.close()
+
+
+def test_channel_stacks(hub):
+    settings = AnalyserSettings()
+    settings.n_frames_model = 2
+    settings.crop_size = 8
+    analyser = Analyser(hub, prediction_time=0, policy="fifo", settings=settings)
+    for t in range(3):
+        for c in range(2):
+            img = np.full((16, 16), 10 * c + t, dtype=np.uint16)
+            hub.frameReady.emit(img, MDAEvent(index={"t": t, "c": c}), {})
+            assert analyser.join(timeout=2)
+    # Channels that are not analysed are stacked as well
+    assert list(analyser.frame_stack(channel_index=1).max(axis=(1, 2))) == [11, 12]
+    assert list(analyser.frame_stack(channel_index=0).max(axis=(1, 2))) == [1, 2]
+    analyser.close()
+
+
+def test_stack_snapshots(hub, monkeypatch):
+    stacks = []
+
+    def predict(img, event, metadata, hub, prediction_time, stack, *crop):
+        time.sleep(prediction_time)
+        assert np.array_equal(stack[-1], img)
+        stacks.append(list(stack[:, 0, 0]))
+
+    monkeypatch.setattr(analyser_module, "dummy_predict", predict)
+    settings = AnalyserSettings()
+    settings.n_frames_model = 3
+    analyser = Analyser(hub, prediction_time=0.1, policy="latest", settings=settings)
+    hub.frameReady.emit(np.zeros((16, 16), np.uint16), MDAEvent(index={"t": 0}), {})
+    time.sleep(0.05)
+    for t in range(1, 5):
+        img = np.full((16, 16), t, dtype=np.uint16)
+        hub.frameReady.emit(img, MDAEvent(index={"t": t}), {})
+    assert analyser.join(timeout=2)
+    # Frames arriving during the prediction do not change its stack, frames that
+    # are dropped are still stacked
+    assert stacks == [[0], [2, 3, 4]]
+    assert dict(analyser.dropped) == {"replaced": 3}
+    analyser.close()
+
+
+def test_crop_and_binning(hub):
+    analyses = []
+    hub.new_analysis.connect(lambda img, event, meta: analyses.append((img, meta)))
+    written = []
+    hub.new_writer_frame.connect(lambda img, event, meta: written.append(img))
+    settings = AnalyserSettings()
+    settings.crop_size = 8
+    settings.binning = 2
+    analyser = Analyser(hub, prediction_time=0, settings=settings)
+    img = np.zeros((16, 16), dtype=np.uint16)
+    img[4:12, 4:12] = np.arange(64).reshape(8, 8)
+    hub.frameReady.emit(img, MDAEvent(index={"t": 0, "c": 0}), {})
+    assert analyser.join(timeout=2)
+    assert analyser._frames.frames.shape[2:] == (4, 4)
+    binned = img[4:12, 4:12].reshape(4, 2, 4, 2).mean(axis=(1, 3)).astype(np.uint16)
+    # The output is emitted at the size of the binned crop, with its limits
+    output, meta = analyses[0]
+    assert output * 65535 == pytest.approx(binned)
+    assert (meta["crop_limits"].y_start, meta["crop_limits"].x_start) == (4, 4)
+    assert meta["binning"] == 2
+    # The writer gets the frame at the full size, zero outside of the crop
+    expected = np.zeros((16, 16), dtype=np.uint16)
+    expected[4:12, 4:12] = binned.repeat(2, axis=0).repeat(2, axis=1)
+    expected = (expected / 65535 * 1e4).astype(np.uint16).T
+    assert written[0].dtype == np.uint16
+    assert np.array_equal(written[0], expected)
+    analyser.close()
+
+
+def test_workers(hub):
+    analyser = Analyser(hub, prediction_time=0.1, policy="fifo", n_workers=4)
+    start = time.perf_counter()
+    emit_frames(hub, 4)
+    assert analyser.join(timeout=2)
+    assert time.perf_counter() - start < 0.3
+    assert analyser.analysed == 4
+    assert not analyser.dropped
+    analyser.close()
+    assert not any(worker.is_alive() for worker in analyser._workers)
+
+
+def test_unknown_policy(hub):
+    with pytest.raises(ValueError):
+        Analyser(hub, policy="random")
+
+
+def test_process_mode(hub):
+    analyses = []
+    hub.new_analysis.connect(lambda img, event, meta: analyses.append(img))
+    analyser = Analyser(
+        hub, prediction_time=0.01, policy="fifo", n_workers=2, mode="process"
+    )
+    img = np.full((16, 16), 65535, dtype=np.uint16)
+    for t in range(3):
+        hub.frameReady.emit(img, MDAEvent(index={"t": t, "c": 0}), {})
+    assert analyser.join(timeout=30)
+    assert analyser.analysed == len(analyses) == 3
+    assert all(np.allclose(output, 1.0) for output in analyses)
+    # The rings are reallocated for frames of another shape, cropped to a square
+    hub.frameReady.emit(img[:8], MDAEvent(index={"t": 3, "c": 0}), {})
+    assert analyser.join(timeout=30)
+    assert analyser._frames.shape[1:] == (8, 8)
+    assert analyses[-1].shape == (8, 8)
+    assert np.allclose(analyses[-1], 1.0)
+    assert not analyser.dropped
+    analyser.close()
+    assert not any(process.is_alive() for process in analyser._processes)
@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pytest
+from useq import MDAEvent
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.dispatch_recorder import DispatchRecorder
+from pymmcore_eda.queue_manager import QueueManager
+
+
+def test_ring_buffer(tmp_path):
+    recorder = DispatchRecorder(capacity=4)
+    ids = [
+        recorder.record_dispatch(i, i + 0.001, "a" if i % 2 else "b") for i in range(6)
+    ]
+    assert len(recorder) == 4
+    records = recorder.to_numpy()
+    assert list(records["id"]) == [2, 3, 4, 5]
+    assert recorder.actuators == {"b": 0, "a": 1}
+
+    # Records that were overwritten are not touched anymore
+    recorder.set_time(ids[0], "runner_start", 10.0)
+    recorder.set_time(ids[5], "runner_start", 5.01)
+    assert np.isnan(recorder.to_numpy()["runner_start"][:3]).all()
+    assert recorder.latency("runner_start") == pytest.approx([0.01])
+    assert recorder.summary()["dispatched"]["mean"] == pytest.approx(1.0)
+    counts, _ = recorder.histogram(bins=5)
+    assert counts.sum() == 4
+
+    recorder.to_csv(tmp_path / "dispatch.csv")
+    lines = (tmp_path / "dispatch.csv").read_text().splitlines()
+    assert lines[0] == "id,planned,dispatched,runner_start,frame_ready,actuator"
+    assert len(lines) == 5
+
+
+def test_queue_manager_records():
+    queue_manager = QueueManager()
+    recorder = queue_manager.start_recording()
+    for i in range(5):
+        queue_manager.register_event(
+            EDAEvent(min_start_time=0.05 + i * 0.02), actuator_id="base"
+        )
+    time.sleep(0.3)
+    queue_manager.stop_seq()
+    events = list(queue_manager.acq_queue_iterator)
+    assert [e.metadata["dispatch_id"] for e in events] == list(range(5))
+
+    for event in events:
+        recorder.event_started(event)
+        recorder.frame_ready(None, event, {})
+    records = recorder.to_numpy()
+    assert (records["actuator"] == recorder.actuators["base"]).all()
+    assert (recorder.latency() >= 0).all()
+    assert recorder.latency().max() < 0.05
+    assert (records["frame_ready"] >= records["runner_start"]).all()
+    assert isinstance(events[0], MDAEvent)
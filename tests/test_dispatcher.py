@@ -0,0 +1,250 @@
+import threading
+import time
+
+import pytest
+from useq import MDAEvent, MDASequence
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.queue_manager import QueueManager
+
+
+def drain(queue_manager: QueueManager) -> list[MDAEvent]:
+    return list(queue_manager.acq_queue_iterator)
+
+
+def test_single_dispatcher_thread():
+    queue_manager = QueueManager()
+    n_threads = threading.active_count()
+    for i in range(50):
+        queue_manager.register_event(EDAEvent(min_start_time=0.2 + i * 0.005))
+    time.sleep(0.1)
+    assert threading.active_count() == n_threads
+
+    time.sleep(0.5)
+    assert threading.active_count() == n_threads
+    queue_manager.stop_seq()
+    events = drain(queue_manager)
+    assert len(events) == 50
+    times = [event.metadata["dynamic_start_time"] for event in events]
+    assert times == sorted(times)
+    queue_manager._dispatcher.join(1)
+    assert not queue_manager._dispatcher.is_alive()
+
+
+def test_new_head_rearms_dispatcher():
+    queue_manager = QueueManager()
+    queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="Cy5"))
+    queue_manager.register_event(EDAEvent(min_start_time=0.1, channel="DAPI"))
+    time.sleep(0.3)
+    assert queue_manager.acq_queue.get(timeout=0.1).channel.config == "DAPI"
+    assert queue_manager.acq_queue.empty()
+    queue_manager.stop_seq()
+
+
+def test_pause_holds_dispatch():
+    queue_manager = QueueManager()
+    queue_manager.toggle_pause(True)
+    queue_manager.register_event(EDAEvent(min_start_time=0.05))
+    time.sleep(0.2)
+    assert queue_manager.acq_queue.empty()
+    queue_manager.toggle_pause(False)
+    # The paused time is added, so the event is due 0.2 s later
+    time.sleep(0.3)
+    assert not queue_manager.acq_queue.empty()
+    queue_manager.stop_seq()
+
+
+def test_burst_dispatch():
+    queue_manager = QueueManager()
+    for channel in ("DAPI", "FITC", "Cy5"):
+        queue_manager.register_event(EDAEvent(min_start_time=0.1, channel=channel))
+    queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="DAPI"))
+    time.sleep(0.2)
+    burst = [queue_manager.acq_queue.get_nowait() for _ in range(3)]
+    assert [event.channel.config for event in burst] == ["Cy5", "DAPI", "FITC"]
+    assert queue_manager.acq_queue.empty()
+    queue_manager.stop_seq()
+
+
+def test_preemptive_dispatch():
+    queue_manager = QueueManager()
+    queue_manager.preemptive = 0.5
+    queue_manager.register_event(EDAEvent(min_start_time=0.6, channel="Cy5"))
+    time.sleep(0.3)
+    event = queue_manager.acq_queue.get_nowait()
+    # Handed over early, with the time the runner should start it
+    assert event.min_start_time == 0.6
+    assert event.metadata["dynamic_start_time"] == 0.6
+    queue_manager.stop_seq()
+
+
+def test_preempted_events_retracted():
+    queue_manager = QueueManager()
+    queue_manager.preemptive = 1.0
+    queue_manager.register_event(EDAEvent(min_start_time=0.8, channel="Cy5"))
+    queue_manager.register_event(EDAEvent(min_start_time=0.9, channel="Cy5"))
+    time.sleep(0.1)
+    assert queue_manager.acq_queue.qsize() == 2
+
+    # A smart event that has to go first takes the early events back
+    queue_manager.register_event(EDAEvent(min_start_time=0.85, channel="DAPI"))
+    time.sleep(0.1)
+    events = [queue_manager.acq_queue.get_nowait() for _ in range(3)]
+    assert [event.min_start_time for event in events] == [0.8, 0.85, 0.9]
+    assert queue_manager.acq_queue.empty()
+    queue_manager.stop_seq()
+
+
+def test_retracted_events_interleaved():
+    queue_manager = QueueManager()
+    queue_manager.preemptive = 5.0
+    for start in (3.0, 3.2, 3.4):
+        queue_manager.register_event(EDAEvent(min_start_time=start, channel="Cy5"))
+    time.sleep(0.1)
+    assert queue_manager.acq_queue.qsize() == 3
+
+    # Later events sort between the retracted ones, not all after them
+    for start in (3.1, 3.3):
+        queue_manager.register_event(EDAEvent(min_start_time=start, channel="DAPI"))
+    time.sleep(0.1)
+    events = [queue_manager.acq_queue.get_nowait() for _ in range(5)]
+    assert [event.min_start_time for event in events] == [3.0, 3.1, 3.2, 3.3, 3.4]
+    assert queue_manager.acq_queue.empty()
+    queue_manager.stop_seq()
+
+
+def test_precision_mode():
+    queue_manager = QueueManager()
+    queue_manager.precision_mode = True
+    recorder = queue_manager.start_recording()
+    for i in range(20):
+        queue_manager.register_event(EDAEvent(min_start_time=0.05 + i * 0.005))
+    time.sleep(0.3)
+    queue_manager.stop_seq()
+    assert len(recorder) == 20
+    latency = recorder.latency()
+    assert (latency >= 0).all()
+    assert recorder.summary()["dispatched"]["p50"] < 1.0
+
+
+@pytest.mark.parametrize("backend", ["sorted", "array"])
+def test_register_events(backend):
+    queue_manager = QueueManager(queue_backend=backend)
+    queue_manager.warmup = 0
+    mda_sequence = MDASequence(
+        channels=["DAPI", "FITC"], time_plan={"interval": 0.05, "loops": 4}
+    )
+    queue_manager.register_events(
+        [*mda_sequence, EDAEvent(min_start_time=0.01, channel="Cy5")], "actuator"
+    )
+    time.sleep(0.5)
+    queue_manager.stop_seq()
+    events = drain(queue_manager)
+    assert len(events) == 9
+    assert [event.channel.config for event in events[:3]] == ["DAPI", "FITC", "Cy5"]
+    times = [event.metadata["dynamic_start_time"] for event in events]
+    assert times == sorted(times)
+
+
+@pytest.mark.parametrize("backend", ["sorted", "array"])
+def test_register_from_threads(backend):
+    queue_manager = QueueManager(queue_backend=backend)
+    queue_manager.warmup = 0
+
+    def register(channel):
+        for i in range(500):
+            event = EDAEvent(min_start_time=0.1 + i * 0.0005, channel=channel)
+            queue_manager.register_event(event, channel)
+
+    # Actuators register while the dispatcher peeks at and takes the head
+    threads = [
+        threading.Thread(target=register, args=(channel,))
+        for channel in ("DAPI", "FITC", "Cy5")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.5)
+    assert len(queue_manager.event_queue) == 0
+    queue_manager.stop_seq()
+    events = drain(queue_manager)
+    # No event is lost or dispatched twice
+    assert len(events) == 1500
+    keys = {(e.channel.config, e.metadata["dynamic_start_time"]) for e in events}
+    assert len(keys) == 1500
+
+
+@pytest.mark.parametrize("backend", ["sorted", "array"])
+def test_tick_resolution(backend):
+    queue_manager = QueueManager(queue_backend=backend, ticks_per_second=1000)
+    assert queue_manager.event_queue.ticks_per_second == 1000
+    queue_manager.register_event(EDAEvent(min_start_time=5.0001, channel="DAPI"))
+    queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="FITC"))
+    assert queue_manager.event_queue.get_unique_values("t") == [5.0]
+    queue_manager.stop_seq()
+
+
+def test_event_handles():
+    queue_manager = QueueManager()
+    first = queue_manager.register_event(EDAEvent(min_start_time=0.1, channel="DAPI"))
+    moved = queue_manager.register_event(EDAEvent(min_start_time=2.0, channel="FITC"))
+    late = queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="Cy5"))
+    assert first.pending
+
+    # Canceling the head re-arms the dispatcher for the next event
+    assert first.cancel()
+    assert not first.pending
+    assert queue_manager._deadline is not None
+    # The rescheduled event becomes the head
+    assert late.reschedule(0.05)
+    time.sleep(0.4)
+    assert not late.cancel()
+    assert moved.reschedule(-0.05)
+    time.sleep(0.2)
+    queue_manager.stop_seq()
+    events = drain(queue_manager)
+    assert [event.channel.config for event in events] == ["Cy5", "FITC"]
+
+
+def test_duplicate_events_get_no_handle():
+    queue_manager = QueueManager()
+    handle = queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="DAPI"))
+    assert handle is not None
+    assert (
+        queue_manager.register_event(EDAEvent(min_start_time=5.0, channel="DAPI"))
+        is None
+    )
+    handles = queue_manager.register_events(
+        [
+            EDAEvent(min_start_time=5.0, channel="DAPI"),
+            EDAEvent(min_start_time=5.0, channel="FITC"),
+        ]
+    )
+    assert handles[0] is None
+    assert handles[1] is not None
+    # The queued event still belongs to the first handle
+    assert handle.cancel()
+    assert len(queue_manager.event_queue) == 1
+    queue_manager.stop_seq()
+
+
+def test_cancel_events_by_criteria():
+    queue_manager = QueueManager()
+    for pos_index in range(3):
+        for channel in ("DAPI", "FITC"):
+            queue_manager.register_event(
+                EDAEvent(min_start_time=0.1, channel=channel, pos_index=pos_index),
+                actuator_id="smart",
+            )
+    canceled = queue_manager.cancel_events("smart", channel="FITC", pos_index=0)
+    assert len(canceled) == 1
+    assert len(queue_manager.cancel_events("smart", pos_index=2)) == 2
+    time.sleep(0.3)
+    queue_manager.stop_seq()
+    events = drain(queue_manager)
+    assert [(e.channel.config, e.index["p"]) for e in events] == [
+        ("DAPI", 0),
+        ("DAPI", 1),
+        ("FITC", 1),
+    ]
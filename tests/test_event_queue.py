@@ -1,14 +1,17 @@
+import random
+
 import pytest
 from useq import Channel, MDASequence
 
+from pymmcore_eda._array_event_queue import ArrayEventQueue
 from pymmcore_eda._eda_event import EDAEvent
 from pymmcore_eda._event_queue import DynamicEventQueue
 
 
-@pytest.fixture
-def queue():
-    """Create a fresh queue for each test."""
-    return DynamicEventQueue()
+@pytest.fixture(params=[DynamicEventQueue, ArrayEventQueue])
+def queue(request):
+    """Create a fresh queue for each test, for both backends."""
+    return request.param()
 
 
 @pytest.fixture
@@ -199,3 +202,269 @@ def test_dynamic_indexing(queue, sample_events):
     queue.add(new_event)
 
     assert new_event.min_start_time == 0.0
+
+
+def test_positional_lookups(queue, sample_events):
+    """Test index/value lookups in both directions and the length of the queue."""
+    for event in sample_events:
+        queue.add(event)
+
+    assert len(queue) == 4
+    assert queue.get_value_at_index("t", -1) == 10.0
+    assert queue.get_value_at_index("t", -4) is None
+    assert queue._get_index_of_value("t", 10.0) == 2
+    assert queue._get_index_of_value("t", 7.0) is None
+    assert queue._get_index_of_value("c", "TRITC") == 2
+    assert queue._get_index_of_value("c", "FITC") is None
+    assert queue.get_value_at_index("c", 3) == "Cy5"
+
+
+def test_get_next_batch(queue, sample_events):
+    """Test that events sharing the head's time are returned together."""
+    for event in sample_events:
+        queue.add(event)
+    queue.add(EDAEvent(min_start_time=10.0, channel="DAPI", reset_event_timer=True))
+
+    assert [e.min_start_time for e in queue.get_next_batch()] == [0.0]
+    assert [e.min_start_time for e in queue.get_next_batch()] == [5.0]
+    # Without a sequence channels are ordered by name, the reset event splits
+    # the time point
+    assert [e.channel.config for e in queue.get_next_batch()] == ["Cy5"]
+    reset_batch = queue.get_next_batch()
+    assert len(reset_batch) == 1
+    assert reset_batch[0].reset_event_timer
+    assert [e.channel.config for e in queue.get_next_batch()] == ["TRITC"]
+    assert queue.get_next_batch() == []
+
+    # All events of one time point share the same time index
+    for channel in ("DAPI", "GFP"):
+        queue.add(EDAEvent(min_start_time=20.0, channel=channel))
+    batch = queue.get_next_batch()
+    assert [e.channel.config for e in batch] == ["DAPI", "GFP"]
+    assert {e.index["t"] for e in batch} == {3}
+
+
+def test_add_many(queue, sample_events):
+    """Test that add_many gives the same queue as adding one by one."""
+    single = DynamicEventQueue()
+    for event in sample_events:
+        single.add(event.model_copy())
+    duplicate = sample_events[1].model_copy()
+    attached = EDAEvent(channel="GFP", attach_index={"t": 1})
+    queue.add_many([*sample_events, duplicate, attached])
+
+    assert len(queue) == len(single) + 1
+    assert attached.min_start_time == 5.0
+    assert queue.get_unique_values("t") == single.get_unique_values("t")
+    times = [(e.min_start_time, e.channel.config) for e in queue._events]
+    assert times == sorted(times, key=lambda t: t[0])
+
+
+def test_duplicates_rejected_at_crowded_time_point(queue):
+    """Test that duplicates are found by hash among many events at one time."""
+    events = [EDAEvent(min_start_time=1.0, z_pos=float(z)) for z in range(500)]
+    queue.add_many(events)
+    for z in (0, 250, 499):
+        queue.add(EDAEvent(min_start_time=1.0, z_pos=float(z)))
+    queue.add(EDAEvent(min_start_time=1.0, z_pos=1.0, metadata={"new": True}))
+
+    assert len(queue) == 501
+    assert len(queue.get_events_at_time(1.0)) == 501
+    assert len(queue.get_next_batch()) == 501
+    assert queue.get_events_at_time(1.0) == []
+    # Once dispatched, the same event can be added again
+    queue.add(EDAEvent(min_start_time=1.0, z_pos=0.0))
+    assert len(queue) == 1
+
+
+def test_times_quantised_to_ticks(queue):
+    """Test that times differing by floating point error share a time point."""
+    queue.add(EDAEvent(min_start_time=0.3, channel="DAPI"))
+    queue.add(EDAEvent(min_start_time=0.1, start_time_offset=0.2, channel="GFP"))
+    queue.add(EDAEvent(min_start_time=0.1 + 0.2, channel="Cy5"))
+    # Same event as the first one, only by floating point error different
+    queue.add(EDAEvent(min_start_time=0.1 + 0.2, channel="DAPI"))
+
+    assert len(queue) == 3
+    assert queue.get_unique_values("t") == [0.3]
+    assert queue.get_value_at_index("t", 0) == 0.3
+    assert queue._get_index_of_value("t", 0.1 + 0.2) == 0
+    assert len(queue.get_events_at_time(0.300001)) == 0
+    assert len(queue.get_events_at_time(0.3000000001)) == 3
+    batch = queue.get_next_batch()
+    assert len(batch) == 3
+    assert {e.min_start_time for e in batch} == {0.3}
+    assert {e.index["t"] for e in batch} == {0}
+
+
+def test_tick_resolution():
+    """Test that the resolution of the time points can be configured."""
+    queue = DynamicEventQueue(ticks_per_second=1000)
+    queue.add(EDAEvent(min_start_time=1.0001, channel="DAPI"))
+    queue.add(EDAEvent(min_start_time=1.0, channel="GFP"))
+    queue.add(EDAEvent(min_start_time=1.002, channel="GFP"))
+    assert queue.get_unique_values("t") == [1.0, 1.002]
+    assert len(queue.get_next_batch()) == 2
+
+
+def test_discard_and_reschedule(queue, sample_events):
+    """Test taking pending events out and moving them without consuming time."""
+    _, event2, event3, _ = sample_events
+    queue.add_many(sample_events)
+    equal = event2.model_copy()
+    assert not queue.discard(equal)
+    assert queue.discard(event2)
+    assert not queue.is_queued(event2)
+    assert queue.get_unique_values("t") == [0.0, 10.0]
+
+    assert queue.reschedule(event3, 2.0)
+    assert queue.is_queued(event3)
+    assert queue.get_unique_values("t") == [0.0, 2.0, 10.0]
+    assert not queue.reschedule(event2, 3.0)
+
+    assert [e.min_start_time for e in queue.get_next_batch()] == [0.0]
+    batch = queue.get_next_batch()
+    assert batch == [event3]
+    # Discarded time points do not count as consumed
+    assert batch[0].index["t"] == 1
+    assert queue.get_next_batch()[0].index["t"] == 2
+
+
+def test_secondary_indexes(queue):
+    """Test finding and dropping events by actuator, channel and position."""
+    events = []
+    for t in range(3):
+        for z_pos, actuator_id in enumerate(("base", "smart")):
+            for channel in ("DAPI", "FITC"):
+                for pos_index in range(2):
+                    event = EDAEvent(
+                        min_start_time=float(t),
+                        channel=channel,
+                        pos_index=pos_index,
+                        z_pos=z_pos,
+                    )
+                    event.actuator_id = actuator_id
+                    events.append(event)
+    queue.add_many(events)
+
+    found = queue.find(actuator_id="smart", channel="FITC", pos_index=1)
+    assert len(found) == 3
+    assert [e.min_start_time for e in found] == [0.0, 1.0, 2.0]
+    assert len(queue.find(channel="DAPI")) == 12
+    assert queue.find(actuator_id="other") == []
+    assert len(queue.find()) == 24
+
+    removed = queue.discard_many(actuator_id="smart", channel="FITC")
+    assert len(removed) == 6
+    assert len(queue) == 18
+    assert queue.find(actuator_id="smart", channel="FITC") == []
+    # Dispatched events leave the indexes as well
+    queue.get_next_batch()
+    assert len(queue.find(actuator_id="base")) == 8
+    assert "FITC" in queue._field_indexes["channel"]
+
+
+def test_compact(queue):
+    """Test that values no pending event uses are retired by compact."""
+    for t in range(4):
+        queue.add(EDAEvent(min_start_time=float(t), z_pos=float(t), pos_index=1))
+    queue.add(EDAEvent(min_start_time=3.0, z_pos=10.0, pos_name="A1"))
+
+    assert [e.index["t"] for e in queue.get_next_batch()] == [0]
+    assert queue.get_next_batch()[0].index["t"] == 1
+    queue.compact()
+    assert queue.get_unique_values("z") == [2.0, 3.0, 10.0]
+    assert queue.get_unique_values("p") == [1]
+    # attach_index refers to the values that are left
+    attached = EDAEvent(attach_index={"t": 0, "z": 0})
+    queue.add(attached)
+    assert (attached.min_start_time, attached.z_pos) == (2.0, 2.0)
+
+    # A retired value can come back
+    queue.add(EDAEvent(min_start_time=5.0, z_pos=0.0))
+    queue.compact()
+    assert queue.get_unique_values("z") == [0.0, 2.0, 3.0, 10.0]
+    assert [e.index["t"] for e in queue.get_next_batch()] == [2, 2]
+    assert sorted(e.index["z"] for e in queue.get_next_batch()) == [2, 3]
+    queue.compact()
+    assert queue.get_unique_values("z") == [0.0]
+    assert queue.get_unique_values("g") == []
+
+
+def test_compact_every():
+    """Test that a long running queue stays bounded with automatic compaction."""
+    queue = DynamicEventQueue()
+    queue.compact_every = 10
+    for t in range(1000):
+        queue.add(EDAEvent(min_start_time=float(t), z_pos=t * 0.1))
+        queue.get_next_batch()
+    assert len(queue.get_unique_values("z")) == 0
+    assert len(queue.get_unique_values("t")) == 0
+    assert not queue._events_by_time
+    assert queue._t_index == 1000
+
+
+def test_backends_agree():
+    """Test that both backends hand out the same events in the same order."""
+    rng = random.Random(0)
+    sequence = MDASequence(channels=["DAPI", "FITC"])
+    queues = DynamicEventQueue(), ArrayEventQueue()
+    outputs: list[list] = [[], []]
+    for _ in range(50):
+        batch = [
+            EDAEvent(
+                min_start_time=rng.choice([None, float(rng.randrange(20))]),
+                channel=rng.choice([None, "DAPI", "FITC", "Cy5"]),
+                z_pos=rng.choice([None, float(rng.randrange(5))]),
+                pos_index=rng.randrange(3),
+                sequence=sequence,
+            )
+            for _ in range(rng.randrange(1, 30))
+        ]
+        n_batches = rng.randrange(3)
+        for queue, output in zip(queues, outputs, strict=True):
+            events = [event.model_copy() for event in batch]
+            if len(events) > 10:
+                queue.add_many(events)
+            else:
+                for event in events:
+                    queue.add(event)
+            if events[0] in queue.find(pos_index=events[0].pos_index):
+                queue.discard(events[0])
+            for _ in range(n_batches):
+                output.append(queue.get_next_batch())
+    for queue, output in zip(queues, outputs, strict=True):
+        while batch := queue.get_next_batch():
+            output.append(batch)
+    sorted_output, array_output = outputs
+    assert sorted_output == array_output
+    assert [e.index for b in sorted_output for e in b] == [
+        e.index for b in array_output for e in b
+    ]
+
+
+def test_backends_agree_on_single_adds():
+    """Test single adds and removals into a large queue, read after every add."""
+    rng = random.Random(1)
+    queues = DynamicEventQueue(), ArrayEventQueue()
+    bulk = [EDAEvent(min_start_time=float(t), z_pos=float(t % 7)) for t in range(3000)]
+    for queue in queues:
+        queue.add_many(event.model_copy() for event in bulk)
+    outputs: list[list] = [[], []]
+    for i in range(600):
+        event = EDAEvent(
+            min_start_time=float(rng.randrange(3000)),
+            z_pos=float(rng.randrange(7, 10)),
+            channel=rng.choice([None, "DAPI"]),
+        )
+        event.actuator_id = rng.choice(["a", "b"])
+        for queue, output in zip(queues, outputs, strict=True):
+            queue.add(event.model_copy())
+            if i % 50 == 0:
+                output.append(queue.discard_many(actuator_id="a"))
+            output.append(queue.get_next_batch())
+    for queue, output in zip(queues, outputs, strict=True):
+        while batch := queue.get_next_batch():
+            output.append(batch)
+    sorted_output, array_output = outputs
+    assert sorted_output == array_output
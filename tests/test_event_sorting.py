@@ -1,5 +1,6 @@
 import queue
 
+import numpy as np
 from useq import Channel
 
 from pymmcore_eda._eda_event import EDAEvent  # Replace with actual import path
@@ -548,5 +549,88 @@ def test_alternate_z_direction():
         ), f"Expected z_pos {expected_z}, got {event.z_pos} at index {i}"
 
 
+def test_sort_key_cached_and_invalidated():
+    """The sort key is computed once and recomputed after sort fields change."""
+    sequence = EDASequence(axis_order="tpgcz", channels=("DAPI", "FITC"))
+    event = EDAEvent(
+        channel=Channel(config="FITC"),
+        z_pos=1.0,
+        pos_index=2,
+        min_start_time=3.0,
+        sequence=sequence,
+    )
+
+    key = event.sort_key
+    assert key is event.sort_key
+    assert key == (1, 3.0, 1, 2.0, 0, 0.0, 1, 1.0, 1, 1.0)
+
+    event.min_start_time = 5.0
+    assert event.sort_key[1] == 5.0
+
+    event.channel = Channel(config="DAPI")
+    assert event.sort_key[7] == 0.0
+
+
+def test_sort_key_matches_comparisons():
+    """Sorting by key gives the same order as sorting the events directly."""
+    sequence = EDASequence(
+        axis_order="tczpg", z_direction="alternate", channels=("DAPI", "FITC")
+    )
+    events = [
+        EDAEvent(
+            channel=Channel(config=channel),
+            z_pos=z,
+            pos_index=p,
+            min_start_time=t,
+            sequence=sequence,
+        )
+        for t in (1.0, 0.0)
+        for channel in ("FITC", "DAPI", "Cy5")
+        for z in (2.0, 0.0, 1.0)
+        for p in (1, 0)
+    ]
+    by_key = sorted(events, key=lambda e: e.sort_key)
+    assert by_key == sorted(events)
+    assert [(e.channel.config, e.z_pos) for e in by_key[:6:2]] == [
+        ("DAPI", 0.0),
+        ("DAPI", 1.0),
+        ("DAPI", 2.0),
+    ]
+    assert [(e.channel.config, e.z_pos) for e in by_key[6:12:2]] == [
+        ("FITC", 2.0),
+        ("FITC", 1.0),
+        ("FITC", 0.0),
+    ]
+    # Channels that are not part of the sequence go last
+    assert by_key[12].channel.config == "Cy5"
+
+
+def test_hash_cached_and_invalidated():
+    """The hash and metadata digest are cached until a field they use is set."""
+    mask = np.zeros((64, 64), dtype=bool)
+    event = EDAEvent(min_start_time=1.0, metadata={"mask": mask})
+    same = EDAEvent(min_start_time=1.0, metadata={"mask": mask.copy()})
+    assert event == same
+    assert hash(event) == hash(same)
+
+    digest = event.metadata_digest
+    assert digest is event.metadata_digest
+    event.index = {"t": 0}
+    assert digest is event.metadata_digest
+    assert hash(event) == hash(same)
+
+    mask = mask.copy()
+    mask[0, 0] = True
+    event.metadata = {"mask": mask}
+    assert event.metadata_digest != digest
+    assert event != same
+    assert hash(event) != hash(same)
+
+    event.metadata = {"mask": same.metadata["mask"]}
+    event.exposure = 10.0
+    assert event != same
+    assert hash(event) != hash(same)
+
+
 if __name__ == "__main__":
     test_alternate_z_direction()
@@ -0,0 +1,58 @@
+import time
+
+from pymmcore_plus import CMMCorePlus
+from pymmcore_plus.core import SequencedEvent
+from useq import MDASequence
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.actuator import MDAActuator
+from pymmcore_eda.queue_manager import QueueManager
+
+
+def test_z_stack_sequenced():
+    mmc = CMMCorePlus()
+    mmc.loadSystemConfiguration()
+    mmc.setProperty("Z", "UseSequences", "Yes")
+
+    queue_manager = QueueManager(mmcore=mmc)
+    queue_manager.hardware_sequencing = True
+    queue_manager.warmup = 0
+
+    mda_sequence = MDASequence(
+        channels=["DAPI"],
+        z_plan={"range": 4, "step": 1},
+        time_plan={"interval": 0.5, "loops": 2},
+    )
+    base_actuator = MDAActuator(queue_manager, mda_sequence)
+    base_actuator.wait = False
+    base_actuator.thread.start()
+    base_actuator.thread.join()
+    time.sleep(1.5)
+
+    # A smart event between the two time points stays on its own
+    queue_manager.register_event(EDAEvent(channel="FITC", min_start_time=-0.1))
+    time.sleep(1)
+    queue_manager.stop_seq()
+
+    events = list(queue_manager.acq_queue_iterator)
+    sequenced = [e for e in events if isinstance(e, SequencedEvent)]
+    # The first event resets the event timer and is always dispatched alone
+    assert [len(e.events) for e in sequenced] == [4, 5]
+    assert events[-1].channel.config == "FITC"
+
+
+def test_sequencing_off():
+    mmc = CMMCorePlus()
+    mmc.loadSystemConfiguration()
+    mmc.setProperty("Z", "UseSequences", "Yes")
+    mmc.mda.engine.use_hardware_sequencing = False
+
+    queue_manager = QueueManager(mmcore=mmc)
+    for z in range(3):
+        queue_manager.register_event(EDAEvent(min_start_time=0.0, z_pos=z))
+    time.sleep(3.5)
+    queue_manager.stop_seq()
+
+    events = list(queue_manager.acq_queue_iterator)
+    assert len(events) == 3
+    assert not any(isinstance(e, SequencedEvent) for e in events)
@@ -105,3 +105,67 @@ def test_from_mda_event_with_existing_attributes():
     assert eda_event.min_start_time == 5.0
     assert eda_event.exposure == 100.0
     assert eda_event.channel.config == "DAPI"
+
+
+def test_to_mda_event_matches_strict():
+    """Test that the fast conversion gives the same MDAEvent as full validation."""
+    eda_sequence = EDASequence(channels=("DAPI", "GFP"), axis_order="tpcz")
+    mda_sequence = MDASequence(channels=["DAPI"], time_plan={"interval": 1, "loops": 2})
+    events = [
+        EDAEvent(),
+        EDAEvent(
+            index={"t": 1, "c": 0},
+            min_start_time=2.0,
+            channel="GFP",
+            exposure=10,
+            x_pos=1,
+            z_pos=3.5,
+            pos_name="A1",
+            properties=[("Camera", "Binning", 2)],
+            metadata={"nested": {"key": "value"}},
+            sequence=eda_sequence,
+            keep_shutter_open=True,
+        ),
+        EDAEvent(min_start_time=1.0, sequence=mda_sequence, reset_event_timer=True),
+    ]
+    for event in events:
+        for retain in (False, True):
+            fast = event.to_mda_event(retain)
+            strict = event.to_mda_event(retain, strict=True)
+            assert fast == strict
+            assert fast.model_dump() == strict.model_dump()
+
+    # The sequence is converted once and shared between the events
+    first, second = events[1].to_mda_event(), events[1].to_mda_event()
+    assert isinstance(first.sequence, MDASequence)
+    assert first.sequence is second.sequence
+    # The metadata of the EDAEvent is not changed
+    assert "dynamic_start_time" not in events[1].metadata
+    # Changing the sequence invalidates the conversion
+    eda_sequence.add_channels(("Cy5",))
+    assert len(events[1].to_mda_event().sequence.channels) == 3
+
+
+def test_from_mda_events():
+    """Test that the batch conversion gives the same events as one by one."""
+    mda_sequence = MDASequence(
+        channels=["DAPI", "GFP"],
+        time_plan={"interval": 1.0, "loops": 3},
+        z_plan={"range": 2, "step": 1},
+        metadata={"name": "test"},
+    )
+    mda_events = list(mda_sequence)
+    events = EDAEvent.from_mda_events(mda_events)
+    for event, mda_event in zip(events, mda_events, strict=True):
+        single = EDAEvent().from_mda_event(mda_event)
+        assert event.model_dump() == single.model_dump()
+        assert event == single
+        assert hash(event) == hash(single)
+        assert event.sort_key == single.sort_key
+    # All events share one converted sequence
+    assert isinstance(events[0].sequence, EDASequence)
+    assert all(event.sequence is events[0].sequence for event in events)
+
+    eda_sequence = EDASequence(channels=("DAPI", "GFP"))
+    events = EDAEvent.from_mda_events(mda_events, eda_sequence)
+    assert all(event.sequence is eda_sequence for event in events)
@@ -0,0 +1,46 @@
+import pytest
+from useq import Channel, MDASequence
+
+from pymmcore_eda._eda_sequence import EDASequence
+from pymmcore_eda.planner import CostModel, plan_timeline
+
+
+def test_plan_fits():
+    mda_sequence = MDASequence(
+        channels=[Channel(config="DAPI", exposure=100)],
+        time_plan={"interval": 1, "loops": 5},
+    )
+    plan = plan_timeline([mda_sequence])
+
+    assert len(plan.events) == 5
+    assert plan.missed == []
+    assert plan.total_duration == pytest.approx(4.1)
+    assert plan.camera_load() == pytest.approx([0.1] * 5)
+
+
+def test_plan_overloaded():
+    eda_sequence = EDASequence(channels=("DAPI", "FITC"))
+    mda_sequence = MDASequence(
+        channels=[
+            Channel(config="FITC", exposure=300),
+            Channel(config="DAPI", exposure=300),
+        ],
+        time_plan={"interval": 0.5, "loops": 4},
+    )
+    cost_model = CostModel(channel_switch=0.1)
+    plan = plan_timeline([mda_sequence], eda_sequence, cost_model)
+
+    # The order of the channels follows the EDASequence
+    assert [e.event.channel.config for e in plan.events[:2]] == ["DAPI", "FITC"]
+    assert plan.events[1].exposure_start == pytest.approx(0.4)
+    # Every time point takes 0.7 s, more than the interval
+    assert [e.event.min_start_time for e in plan.missed] == [
+        0.5,
+        0.5,
+        1.0,
+        1.0,
+        1.5,
+        1.5,
+    ]
+    assert plan.total_duration == pytest.approx(4 * 0.7 + 3 * 0.1)
+    assert plan.camera_load().max() <= 1.0
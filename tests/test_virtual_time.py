@@ -0,0 +1,125 @@
+import time
+
+from _runner import MockRunner
+from useq import MDASequence
+
+from pymmcore_eda._eda_event import EDAEvent
+from pymmcore_eda.actuator import MDAActuator
+from pymmcore_eda.queue_manager import QueueManager
+from pymmcore_eda.time_machine import VirtualTimeMachine
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < end:
+        time.sleep(0.01)
+
+
+def test_virtual_time_machine():
+    time_machine = VirtualTimeMachine()
+    assert time_machine.event_seconds_elapsed() == 0.0
+    time_machine.sleep(2.5)
+    assert time_machine.event_seconds_elapsed() == 2.5
+    time_machine.consume_event(EDAEvent(reset_event_timer=True))
+    assert time_machine.event_seconds_elapsed() == 0.0
+    assert time_machine.clock() == 2.5
+
+
+def test_thirty_minutes_in_no_time():
+    time_machine = VirtualTimeMachine()
+    queue_manager = QueueManager(time_machine=time_machine)
+    runner = MockRunner(time_machine=time_machine)
+
+    mda_sequence = MDASequence(
+        channels=["DAPI", "FITC"],
+        time_plan={"interval": 60, "loops": 30},
+    )
+    base_actuator = MDAActuator(queue_manager, mda_sequence)
+    base_actuator.wait = False
+
+    start = time.perf_counter()
+    runner.run(queue_manager.acq_queue_iterator)
+    base_actuator.thread.start()
+    base_actuator.thread.join()
+    wait_for(lambda: len(runner.events) == 60)
+    queue_manager.stop_seq()
+    assert time.perf_counter() - start < 5
+
+    assert len(runner.events) == 60
+    times = [event.metadata["dynamic_start_time"] for event in runner.events]
+    assert times == sorted(times)
+    assert times[-1] == 29 * 60
+    # The first event resets the timer and is delayed by the warmup
+    assert time_machine.clock() >= 29 * 60 + queue_manager.warmup
+
+
+def test_actuator_waits_on_virtual_clock():
+    time_machine = VirtualTimeMachine()
+    queue_manager = QueueManager(time_machine=time_machine)
+    runner = MockRunner(time_machine=time_machine)
+
+    mda_sequence = MDASequence(time_plan={"interval": 60, "loops": 30})
+    base_actuator = MDAActuator(queue_manager, mda_sequence)
+    assert base_actuator.wait
+
+    start = time.perf_counter()
+    runner.run(queue_manager.acq_queue_iterator)
+    base_actuator.thread.start()
+    base_actuator.thread.join(timeout=5)
+    assert not base_actuator.thread.is_alive()
+    assert time.perf_counter() - start < 5
+    assert queue_manager.dispatched_time == 29 * 60
+    queue_manager.stop_seq()
+
+
+def test_streaming_actuator_bounded_queue():
+    time_machine = VirtualTimeMachine()
+    queue_manager = QueueManager(time_machine=time_machine)
+    runner = MockRunner(time_machine=time_machine)
+
+    queue_sizes = []
+    add = queue_manager.event_queue.add
+
+    def add_and_measure(event):
+        added = add(event)
+        queue_sizes.append(len(queue_manager.event_queue))
+        return added
+
+    queue_manager.event_queue.add = add_and_measure
+
+    mda_sequence = MDASequence(
+        channels=["DAPI", "FITC"],
+        time_plan={"interval": 10, "loops": 100},
+    )
+    base_actuator = MDAActuator(queue_manager, mda_sequence, horizon=30)
+    base_actuator.wait = False
+    runner.run(queue_manager.acq_queue_iterator)
+    base_actuator.thread.start()
+    base_actuator.thread.join(timeout=10)
+    wait_for(lambda: len(runner.events) == 200)
+    queue_manager.stop_seq()
+
+    assert len(runner.events) == 200
+    times = [event.metadata["dynamic_start_time"] for event in runner.events]
+    assert times == sorted(times)
+    # Never more than the time points within the horizon are waiting
+    assert max(queue_sizes) <= 2 * 4
+
+
+def test_horizon_shorter_than_interval():
+    time_machine = VirtualTimeMachine()
+    queue_manager = QueueManager(time_machine=time_machine)
+    runner = MockRunner(time_machine=time_machine)
+
+    mda_sequence = MDASequence(time_plan={"interval": 10, "loops": 5})
+    base_actuator = MDAActuator(queue_manager, mda_sequence, horizon=5)
+    base_actuator.wait = False
+    runner.run(queue_manager.acq_queue_iterator)
+    base_actuator.thread.start()
+    base_actuator.thread.join(timeout=5)
+    assert not base_actuator.thread.is_alive()
+    wait_for(lambda: len(runner.events) == 5)
+    queue_manager.stop_seq()
+
+    assert len(runner.events) == 5
+    assert queue_manager.dispatched_time == 40